@@ -2,14 +2,14 @@
 Batch Processor - Flexible interface for processing Excel files with OpenAI Assistant
 This module provides a simple function interface without modifying the existing main.py flow
 """
+import orjson
 import logging
+import os
 from typing import List, Dict, Optional
-from main import AssistantIntegration
+from main import get_integration
+from log_setup import configure_logging, log_event
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 
@@ -21,6 +21,9 @@ def process_files(
     extra_attachments: Optional[List[str]] = None,
     output_dir: Optional[str] = None,
     use_conversation: bool = False,
+    resume: bool = True,
+    workers: Optional[int] = None,
+    batch_api: bool = False,
 ) -> List[Dict]:
     """
     Process multiple Excel files from a folder using OpenAI Assistant.
@@ -30,6 +33,12 @@ def process_files(
         assistant_json_file: Path to the assistant JSON configuration file (e.g., "assistant_1.json")
         input_folder: Path to the folder containing Excel files to process
         output_summary_file: Optional path to save batch results summary JSON (default: "batch_results.json")
+        resume: Skip files that already succeeded in a previous run with this summary
+            file (same path, mtime and size, same assistant file, message and output_dir);
+            their earlier results are reused
+        workers: Files processed concurrently (default: BATCH_WORKERS from .env)
+        batch_api: Submit all files as one OpenAI Batch API job (half price, finishes
+            within the 24h batch window); resume, workers and use_conversation do not apply
         
     Returns:
         List of dictionaries containing results for each processed file
@@ -54,46 +63,112 @@ def process_files(
                 print(f"✗ {result['input_file']}: {result.get('error')}")
         ```
     """
-    logger.info("=" * 80)
-    logger.info("BATCH PROCESSOR - Starting")
-    logger.info("=" * 80)
-    logger.info(f"Assistant: {assistant_json_file}")
-    logger.info(f"Input folder: {input_folder}")
-    logger.info(f"User message: {user_message[:100]}..." if len(user_message) > 100 else f"User message: {user_message}")
-    logger.info("=" * 80)
-    
-    # Initialize the integration (uses existing flow)
-    integration = AssistantIntegration()
-    
-    # Use the existing process_batch method from main.py
-    results = integration.process_batch(
-        assistant_json_path=assistant_json_file,
-        user_message=user_message,
+    # The message is the same for every file: log a preview once per batch
+    preview = user_message[:100] + "..." if len(user_message) > 100 else user_message
+    log_event(
+        logger, "batch_processor_start",
+        assistant=assistant_json_file,
         input_folder=input_folder,
-        extra_attachments=extra_attachments,
-        output_dir=output_dir,
-        use_conversation=use_conversation,
+        user_message=preview,
     )
     
+    # Reuse the shared integration (one OpenAI client / connection pool per process)
+    integration = get_integration()
+    
+    # Results are streamed to a JSON Lines file as each file completes, so a
+    # crashed run still leaves a record of everything that finished.
+    results_log_path = _jsonl_path_for(output_summary_file) if output_summary_file else None
+    
+    if batch_api:
+        results = integration.process_batch_offline(
+            assistant_json_path=assistant_json_file,
+            user_message=user_message,
+            input_folder=input_folder,
+            extra_attachments=extra_attachments,
+            output_dir=output_dir,
+        )
+        # The whole batch finishes at once: write the log in one go so the
+        # summary (and a later resumed run) read it like a process_batch log
+        if results_log_path and results:
+            _write_results_log(results_log_path, results)
+    else:
+        # Use the existing process_batch method from main.py
+        results = integration.process_batch(
+            assistant_json_path=assistant_json_file,
+            user_message=user_message,
+            input_folder=input_folder,
+            extra_attachments=extra_attachments,
+            output_dir=output_dir,
+            use_conversation=use_conversation,
+            results_log_path=results_log_path,
+            resume=resume,
+            workers=workers,
+        )
+    
     # If custom output summary file is specified, save it
     if output_summary_file and results:
-        import json
-        import os
-        # Create directory if it doesn't exist
-        output_dir_path = os.path.dirname(output_summary_file)
-        if output_dir_path:
-            os.makedirs(output_dir_path, exist_ok=True)
-        with open(output_summary_file, 'w', encoding='utf-8') as f:
-            json.dump(results, f, indent=2, ensure_ascii=False)
+        convert_jsonl_to_json(results_log_path, output_summary_file)
         logger.info(f"Custom batch summary saved to {output_summary_file}")
     
-    logger.info("=" * 80)
-    logger.info("BATCH PROCESSOR - Completed")
-    logger.info("=" * 80)
+    log_event(logger, "batch_processor_done", files=len(results), summary=output_summary_file)
     
     return results
 
 
+def _jsonl_path_for(summary_file: str) -> str:
+    """
+    JSON Lines companion of a summary file, e.g. results.json -> results.jsonl
+    (results.jsonl -> results.log.jsonl, so the log never overwrites the summary)
+    """
+    stem, ext = os.path.splitext(summary_file)
+    if ext.lower() == ".jsonl":
+        return stem + ".log.jsonl"
+    return stem + ".jsonl"
+
+
+def _write_results_log(jsonl_path: str, results: List[Dict]) -> None:
+    """Write results as a JSON Lines log (same layout process_batch appends)"""
+    log_dir = os.path.dirname(jsonl_path)
+    if log_dir:
+        os.makedirs(log_dir, exist_ok=True)
+    with open(jsonl_path, 'wb') as f:
+        f.writelines(orjson.dumps(r) + b"\n" for r in results)
+
+
+def convert_jsonl_to_json(jsonl_path: str, json_path: Optional[str] = None) -> str:
+    """
+    Convert a JSON Lines results log into the JSON array summary format.
+    Lines are copied one at a time, so the full result set is never held in memory.
+    
+    Args:
+        jsonl_path: Path to the JSON Lines file
+        json_path: Output path (default: jsonl_path with a .json extension)
+        
+    Returns:
+        Path to the written JSON file
+    """
+    json_path = json_path or os.path.splitext(jsonl_path)[0] + ".json"
+    if os.path.normcase(os.path.abspath(json_path)) == os.path.normcase(os.path.abspath(jsonl_path)):
+        # Opening the output would truncate the log before it is read
+        raise ValueError(f"JSON summary path must differ from the JSON Lines log: {jsonl_path}")
+    output_dir_path = os.path.dirname(json_path)
+    if output_dir_path:
+        os.makedirs(output_dir_path, exist_ok=True)
+    with open(jsonl_path, 'rb') as src, open(json_path, 'wb') as dst:
+        dst.write(b"[")
+        first = True
+        for line in src:
+            line = line.strip()
+            if not line:
+                continue
+            dst.write(b"\n  " if first else b",\n  ")
+            # Each line is already a compact orjson document; re-serialize to validate it
+            dst.write(orjson.dumps(orjson.loads(line)))
+            first = False
+        dst.write(b"\n]\n" if not first else b"]\n")
+    return json_path
+
+
 def process_single_file(
     user_message: str,
     assistant_json_file: str,
@@ -127,15 +202,10 @@ def process_single_file(
             print(f"Downloaded: {file['filename']}")
         ```
     """
-    logger.info("=" * 80)
-    logger.info("SINGLE FILE PROCESSOR - Starting")
-    logger.info("=" * 80)
-    logger.info(f"Assistant: {assistant_json_file}")
-    logger.info(f"File: {file_path}")
-    logger.info("=" * 80)
+    log_event(logger, "single_file_start", assistant=assistant_json_file, file=file_path)
     
-    # Initialize the integration (uses existing flow)
-    integration = AssistantIntegration()
+    # Reuse the shared integration (one OpenAI client / connection pool per process)
+    integration = get_integration()
     
     # Use the existing process_request method from main.py
     result = integration.process_request(
@@ -145,9 +215,7 @@ def process_single_file(
         use_conversation=use_conversation
     )
     
-    logger.info("=" * 80)
-    logger.info("SINGLE FILE PROCESSOR - Completed")
-    logger.info("=" * 80)
+    log_event(logger, "single_file_done", file=file_path, status=result.get('status'))
     
     return result
 
@@ -0,0 +1,143 @@
+"""
+Shared command-line runner for the assistant batch steps.
+run_batch_assistant1.py and run_batch_assistant2.py only hold their
+configuration (prompt, assistant file, folders) and call run().
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+from typing import List, Optional
+
+from batch_processor import process_files
+from chat_notifier import (
+    format_batch_results,
+    format_batch_summary,
+    send_chat_message,
+    send_chat_message_async,
+)
+
+
+def run(
+    label: str,
+    assistant_file: str,
+    input_folder: str,
+    output_summary: str,
+    output_folder: str,
+    user_message: str,
+    extra_attachments: Optional[List[str]] = None,
+    use_conversation: bool = False,
+    argv: Optional[List[str]] = None,
+) -> None:
+    """
+    Process every Excel file in input_folder with one assistant, print a
+    summary and send the Google Chat acknowledgement.
+
+    Args:
+        label: Step name used in banners and messages (e.g. "Assistant 1")
+        assistant_file: Path to the assistant JSON configuration
+        input_folder: Folder containing the Excel files to process
+        output_summary: Path of the batch results summary JSON
+        output_folder: Where to save the Excel files returned by the assistant
+        user_message: Message/instruction sent to the assistant for each file
+        extra_attachments: Optional files attached to every request (e.g. mapping txt)
+        use_conversation: Whether to create a conversation per file
+        argv: Command-line arguments (default: sys.argv[1:])
+    """
+    parser = argparse.ArgumentParser(description=f"Batch processing for {label}.")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Files processed concurrently (default: BATCH_WORKERS from .env)",
+    )
+    parser.add_argument(
+        "--batch-api",
+        action="store_true",
+        help="Submit all files as one OpenAI Batch API job (half price, results within 24h)",
+    )
+    parser.add_argument(
+        "--no-resume",
+        action="store_true",
+        help="Process every file again instead of reusing results from the .jsonl log",
+    )
+    args = parser.parse_args(argv)
+
+    # Avoid UnicodeEncodeError on Windows cp1252 console.
+    try:
+        if hasattr(sys.stdout, "reconfigure"):
+            sys.stdout.reconfigure(encoding="utf-8")
+    except Exception:
+        pass
+
+    print("=" * 80)
+    print(f"STARTING BATCH PROCESSING - {label.upper()}")
+    print("=" * 80)
+    print(f"Assistant: {assistant_file}")
+    print(f"Input Folder: {input_folder}")
+    if args.batch_api:
+        print("Mode: OpenAI Batch API (waits for the whole batch, up to 24h)")
+    print("=" * 80)
+
+    try:
+        # Process all files
+        results = process_files(
+            user_message=user_message,
+            assistant_json_file=assistant_file,
+            input_folder=input_folder,
+            output_summary_file=output_summary,
+            extra_attachments=extra_attachments,
+            output_dir=output_folder,
+            use_conversation=use_conversation,
+            resume=not args.no_resume,
+            workers=args.workers,
+            batch_api=args.batch_api,
+        )
+
+        # Show summary
+        print("\n" + "=" * 80)
+        print(f"BATCH PROCESSING COMPLETED - {label.upper()}")
+        print("=" * 80)
+
+        # One pass over the results (each result was already streamed to the .jsonl log)
+        successful, failed = [], []
+        for r in results:
+            (successful if r["status"] == "success" else failed).append(r)
+
+        print(f"Total files processed: {len(results)}")
+        print(f"Successful: {len(successful)}")
+        print(f"Failed: {len(failed)}")
+
+        if failed:
+            print("\nFailed files:")
+            for result in failed:
+                print(f"  FAIL {result['input_file']}: {result.get('error', 'Unknown error')}")
+
+        print(f"\nResults saved to: {output_summary}")
+        print(f"Output Excel files saved in: {output_folder or 'current directory'}")
+        print("=" * 80)
+
+        message = format_batch_results(
+            f"Batch processing acknowledgement - {label}",
+            successful,
+            failed,
+            summary_path=output_summary,
+        )
+        # Queued on the notifier thread; failures are logged and the queue is
+        # flushed before the process exits.
+        send_chat_message_async(message)
+    except Exception as run_error:
+        error_message = f"Batch run failed: {run_error}"
+        try:
+            send_chat_message(
+                format_batch_summary(
+                    total=0,
+                    successful=0,
+                    failed=0,
+                    summary_path=output_summary,
+                    error_message=error_message,
+                )
+            )
+        except Exception as notify_error:
+            print(f"Failed to send Google Chat message: {notify_error}")
+        raise
@@ -1,39 +1,68 @@
 """
 Google Chat webhook notifier for batch acknowledgements.
-Reads webhook URL from .env via GOOGLE_CHAT_WEBHOOK_URL.
+Reads webhook URL from .env via GOOGLE_CHAT_WEBHOOK_URL (once, at import;
+changing it requires restarting the process).
 """
-import json
+import atexit
 import os
-import urllib.request
 import logging
-from typing import Optional
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional
 
+import requests
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 logger = logging.getLogger(__name__)
 
+load_dotenv()
+_WEBHOOK_URL = os.getenv("GOOGLE_CHAT_WEBHOOK_URL")
+
+# Transient webhook failures (rate limiting, server errors) are retried with backoff
+_RETRY = Retry(
+    total=3,
+    backoff_factor=0.5,
+    status_forcelist=[429, 500, 502, 503, 504],
+    allowed_methods=frozenset({"POST"}),
+)
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(max_retries=_RETRY))
+_SESSION.mount("http://", HTTPAdapter(max_retries=_RETRY))
+
+# Single background sender: messages go out in order without blocking the caller
+_NOTIFY_EXEC = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chat-notify")
+# Flush queued messages before the interpreter exits
+atexit.register(_NOTIFY_EXEC.shutdown, wait=True)
+
 
 def send_chat_message(text: str, webhook_url: Optional[str] = None) -> None:
     """
     Send a plain text message to Google Chat via webhook.
     """
-    load_dotenv()
-    url = webhook_url or os.getenv("GOOGLE_CHAT_WEBHOOK_URL")
+    url = webhook_url or _WEBHOOK_URL
     if not url:
         raise ValueError("GOOGLE_CHAT_WEBHOOK_URL is not set")
 
-    payload = {"text": text}
-    data = json.dumps(payload).encode("utf-8")
-    request = urllib.request.Request(
-        url,
-        data=data,
-        headers={"Content-Type": "application/json"},
-        method="POST",
-    )
+    response = _SESSION.post(url, json={"text": text}, timeout=30)
+    response.raise_for_status()
+    logger.info("Google Chat message sent (status: %s)", response.status_code)
 
-    with urllib.request.urlopen(request) as response:
-        _ = response.read()
-        logger.info("Google Chat message sent (status: %s)", response.status)
+
+def _log_send_failure(future: Future) -> None:
+    error = future.exception()
+    if error is not None:
+        logger.error("Failed to send Google Chat message: %s", error)
+
+
+def send_chat_message_async(text: str, webhook_url: Optional[str] = None) -> Future:
+    """
+    Queue a Google Chat message on the background sender and return immediately.
+    Failures are logged; call .result() on the returned Future to wait or re-raise.
+    """
+    future = _NOTIFY_EXEC.submit(send_chat_message, text, webhook_url)
+    future.add_done_callback(_log_send_failure)
+    return future
 
 
 def format_batch_summary(
@@ -57,3 +86,46 @@ def format_batch_summary(
     if error_message:
         lines.append(f"Error: {error_message}")
     return "\n".join(lines)
+
+
+def format_batch_results(
+    title: str,
+    successful: List[Dict],
+    failed: List[Dict],
+    summary_path: Optional[str] = None,
+    max_listed: int = 50,
+) -> str:
+    """
+    Build the per-file acknowledgement message sent after a batch run.
+
+    Args:
+        title: First line of the message
+        successful: Result dicts with status "success"
+        failed: Result dicts with status "error"
+        summary_path: Optional summary JSON path to mention
+        max_listed: Files listed per section; the rest are counted
+
+    Returns:
+        Message text
+    """
+    lines = [
+        title,
+        f"Total files: {len(successful) + len(failed)}",
+        f"Successful: {len(successful)}",
+        f"Failed: {len(failed)}",
+    ]
+    if summary_path:
+        lines.append(f"Summary JSON: {summary_path}")
+    if successful:
+        lines.append("Successful files:")
+        lines.extend(f"  OK  {r['input_file']}" for r in successful[:max_listed])
+        if len(successful) > max_listed:
+            lines.append(f"  ...and {len(successful) - max_listed} more")
+    if failed:
+        lines.append("Failed files:")
+        lines.extend(
+            f"  FAIL {r['input_file']}: {r.get('error', 'Unknown error')}" for r in failed[:max_listed]
+        )
+        if len(failed) > max_listed:
+            lines.append(f"  ...and {len(failed) - max_listed} more")
+    return "\n".join(lines)
@@ -4,7 +4,8 @@ Configuration file for OpenAI Responses API integration
 import os
 from dotenv import load_dotenv
 
-# Load environment variables
+# Load environment variables (read once at import; restart the process to
+# pick up changes to .env)
 load_dotenv()
 
 # OpenAI Configuration
@@ -20,7 +21,34 @@ OPENAI_BASE_URL = "https://api.openai.com/v1"
 MAX_TOOL_ITERATIONS = 50  # Maximum tool call iterations
 MAX_TOOL_CALLS = 40  # Maximum total tool calls per response
 
+# Prompt limiter: the user message plus injected Excel content is clipped to
+# the model context window minus these reserves (in tokens)
+OPENAI_COMPLETION_BUDGET_TOKENS = int(os.getenv("OPENAI_COMPLETION_BUDGET_TOKENS", "1024"))
+# Unset: chosen where the limiter runs, 64 when tiktoken can count exactly and
+# 512 for the 4-chars-per-token estimate (tiktoken may be installed but unable
+# to fetch its BPE file, e.g. offline)
+_INPUT_SAFETY_ENV = os.getenv("OPENAI_INPUT_SAFETY_TOKENS")
+OPENAI_INPUT_SAFETY_TOKENS = int(_INPUT_SAFETY_ENV) if _INPUT_SAFETY_ENV else None
+OPENAI_TRIM_MARGIN_TOKENS = int(os.getenv("OPENAI_TRIM_MARGIN_TOKENS", "512"))
+
 # Batch processing configuration
 # How many files to process concurrently in batch mode.
-# Keep this small to avoid rate limits; start with 2-5.
-BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", "1"))
+# 1 runs files sequentially; >1 runs them as asyncio tasks on one event loop
+# with at most BATCH_WORKERS requests in flight. Keep this small to avoid rate
+# limits; start with 2-5. Values below 1 are treated as 1.
+BATCH_WORKERS = max(1, int(os.getenv("BATCH_WORKERS", "1")))
+
+# HTTP connection pool size for the OpenAI clients. Always larger than
+# BATCH_WORKERS so concurrent requests (plus their uploads/downloads) reuse
+# pooled connections instead of queueing for one or opening new TLS sessions.
+HTTPX_POOL = max(BATCH_WORKERS * 2, 10)
+
+# How many Excel files to multiplex into a single Responses API request.
+# Values > 1 share one copy of the instructions across several files and cut
+# requests against RPM limits; 1 keeps one request per file.
+BATCH_FILES_PER_REQUEST = max(1, int(os.getenv("BATCH_FILES_PER_REQUEST", "1")))
+
+# Proactive OpenAI rate limiting (token bucket shared by all batch workers).
+# Set to your account's limits; 0 disables pacing for that dimension.
+OPENAI_RPM = int(os.getenv("OPENAI_RPM", "0"))
+OPENAI_TPM = int(os.getenv("OPENAI_TPM", "0"))
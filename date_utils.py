@@ -0,0 +1,26 @@
+"""
+Run-date helpers shared by the pipeline scripts.
+"""
+from __future__ import annotations
+
+from datetime import date, timedelta
+from typing import Optional
+
+
+def last_monday(today: Optional[date] = None, exclude_today: bool = False) -> date:
+    """
+    Return the Monday of the current week (today itself when today is Monday).
+
+    Args:
+        today: Reference date (default: date.today())
+        exclude_today: On a Monday, return the previous week's Monday instead
+
+    Returns:
+        The Monday date
+    """
+    today = today or date.today()
+    days_since_monday = today.weekday()
+    # If today is Monday (weekday = 0) and excluded, go back 7 days to last week's Monday
+    if days_since_monday == 0 and exclude_today:
+        return today - timedelta(days=7)
+    return today - timedelta(days=days_since_monday)
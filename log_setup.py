@@ -0,0 +1,46 @@
+"""
+Logging setup shared by the batch modules.
+Records are put on a queue and written by a single listener thread, so
+concurrent batch work never contends on console I/O.
+"""
+import atexit
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+import orjson
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_listener: Optional[QueueListener] = None
+
+
+def configure_logging(level: int = logging.INFO) -> None:
+    """
+    Route the root logger through a QueueHandler/QueueListener pair.
+    Safe to call from every module; only the first call has an effect.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    console = logging.StreamHandler()
+    console.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    # The queue only carries the message (with any traceback); the console
+    # handler applies LOG_FORMAT once on the listener thread.
+    queue_handler.setFormatter(logging.Formatter('%(message)s'))
+    logging.basicConfig(level=level, handlers=[queue_handler], force=True)
+
+    _listener = QueueListener(log_queue, console, respect_handler_level=True)
+    _listener.start()
+    # Drain queued records before the interpreter exits
+    atexit.register(_listener.stop)
+
+
+def log_event(logger: logging.Logger, name: str, **fields) -> None:
+    """Emit one structured record: `<name> {"field": value, ...}`"""
+    logger.info("%s %s", name, orjson.dumps(fields, default=str).decode())
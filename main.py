@@ -1,29 +1,68 @@
 """
 Main script to use OpenAI Responses API with assistant configurations from JSON files
 """
+import asyncio
+import hashlib
 import json
 import logging
 import os
-import glob
+import re
+import threading
 from pathlib import Path
-from openai_service import OpenAIService
+import orjson
+from openai_service import OpenAIService, AsyncOpenAIService
 from typing import Optional, List, Dict, Tuple
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from config import BATCH_WORKERS
+from config import BATCH_WORKERS, BATCH_FILES_PER_REQUEST, OPENAI_RPM, OPENAI_TPM
+from rate_limiter import RateLimiter
+from log_setup import configure_logging, log_event
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+configure_logging()
 logger = logging.getLogger(__name__)
 
+# Input files picked up by batch processing
+_EXCEL_SUFFIXES = ('.xlsx', '.xls')
+
+# Built-in tool types passed through to the Responses API
+_BUILTIN_TOOL_TYPES = frozenset({'file_search', 'code_interpreter', 'web_search', 'computer_use', 'image_generation'})
+
+# Batch-wide user messages at least this long (estimated tokens) are moved
+# into the instructions so the shared prefix hits OpenAI's prompt cache
+_STATIC_MESSAGE_MIN_TOKENS = 200
+
+# Per-file sections in a multiplexed (several files per request) response
+_MULTI_RESULT_RE = re.compile(r"<<RESULT id=(\d+)>>(.*?)<<END>>", re.S)
+
+
+def _load_results_log(path: str) -> Dict[str, Dict]:
+    """Read a JSON Lines results log into {input_path: result}, later lines winning"""
+    entries = {}
+    with open(path, 'rb') as f:
+        for line in f:
+            try:
+                entry = orjson.loads(line)
+            except orjson.JSONDecodeError:
+                # Blank or partially written line (e.g. the run was killed mid-write)
+                continue
+            # Entries written before input_path was recorded are never reused
+            if isinstance(entry, dict) and entry.get("input_path"):
+                entries[entry["input_path"]] = entry
+    return entries
+
 
 class AssistantIntegration:
     """Main integration class for OpenAI Responses API"""
     
+    # Shared across instances so every thread/coroutine in a batch draws from one budget
+    rate_limiter = RateLimiter(rpm=OPENAI_RPM, tpm=OPENAI_TPM)
+    
     def __init__(self):
         """Initialize services"""
         self.openai_service = OpenAIService()
+        # Parsed assistant configs keyed by path -> (mtime_ns, normalized config)
+        self._assistant_cache: Dict[str, Tuple[int, Dict]] = {}
+        self._assistant_cache_lock = threading.Lock()
+        # Converted tools keyed by path -> (config they were built from, formatted tools)
+        self._tools_cache: Dict[str, Tuple[Dict, Optional[List[dict]]]] = {}
         logger.info("Assistant Integration initialized (Responses API)")
     
     def load_assistant_from_file(self, json_file_path: str) -> Dict:
@@ -31,6 +70,9 @@ class AssistantIntegration:
         Load assistant configuration from JSON file
         Returns only the fields needed for OpenAI (matching MongoDB version)
         
+        The parsed config is cached per path and reused until the file's
+        mtime changes, so a batch parses each assistant file once.
+        
         Args:
             json_file_path: Path to the JSON file
             
@@ -38,8 +80,13 @@ class AssistantIntegration:
             Normalized assistant configuration dictionary
         """
         try:
-            with open(json_file_path, 'r', encoding='utf-8') as f:
-                doc = json.load(f)
+            mtime_ns = os.stat(json_file_path).st_mtime_ns
+            with self._assistant_cache_lock:
+                cached = self._assistant_cache.get(json_file_path)
+                if cached is not None and cached[0] == mtime_ns:
+                    return cached[1]
+            
+            doc = orjson.loads(Path(json_file_path).read_bytes())
             
             # Extract and normalize - matching MongoDB's fetchAssistantFromAssistantsCollection
             normalized = {
@@ -52,6 +99,9 @@ class AssistantIntegration:
                 'sampling': doc.get('sampling'),  # Will be None or {temperature, top_p}
             }
             
+            with self._assistant_cache_lock:
+                self._assistant_cache[json_file_path] = (mtime_ns, normalized)
+            
             logger.info(f"Loaded assistant: {normalized.get('name', 'Unknown')}")
             return normalized
             
@@ -74,24 +124,104 @@ class AssistantIntegration:
         for tool in tools:
             # Handle string format: "code_interpreter"
             if isinstance(tool, str):
-                if tool in ['file_search', 'code_interpreter', 'web_search', 'computer_use', 'image_generation']:
+                if tool in _BUILTIN_TOOL_TYPES:
                     formatted_tools.append({"type": tool})
             # Handle object format: {"type": "code_interpreter"}
             elif isinstance(tool, dict):
                 tool_type = tool.get('type')
-                if tool_type in ['file_search', 'code_interpreter', 'web_search', 'computer_use', 'image_generation']:
+                if tool_type in _BUILTIN_TOOL_TYPES:
                     formatted_tools.append({"type": tool_type})
                 elif tool_type == 'function':
                     formatted_tools.append(tool)
         return formatted_tools
     
+    def _prepare_request(self, assistant_json_path: str, extra_instructions: Optional[str] = None) -> Dict:
+        """
+        Load the assistant and resolve the model, instructions, tools and sampling
+        used for a Responses API call
+        
+        Args:
+            assistant_json_path: Path to assistant JSON file
+            extra_instructions: Optional text appended to the assistant instructions
+            
+        Returns:
+            Dictionary of request settings
+        """
+        # Load assistant configuration
+        logger.info(f"Loading assistant from {assistant_json_path}")
+        assistant_data = self.load_assistant_from_file(assistant_json_path)
+        
+        # Extract fields (matching MongoDB flow)
+        assistant_id = assistant_data.get('id', 'unknown')
+        assistant_name = assistant_data.get('name', 'Unknown Assistant')
+        model = assistant_data.get('model', 'gpt-4o')
+        instructions = assistant_data.get('instructions', 'You are a helpful assistant.')
+        if extra_instructions:
+            instructions = f"{instructions}\n\n{extra_instructions.strip()}"
+        
+        # Get tools from builtin_tools field
+        tools = assistant_data.get('builtin_tools', [])
+        
+        # Get sampling (temperature, top_p) if present
+        sampling = assistant_data.get('sampling')  # Can be None or {temperature, top_p}
+        
+        logger.info(f"Using assistant: {assistant_name}")
+        logger.info(f"Model: {model}")
+        # Handle both string and dict tool formats for logging
+        tool_names = []
+        for t in tools:
+            if isinstance(t, str):
+                tool_names.append(t)
+            elif isinstance(t, dict):
+                tool_names.append(t.get('type', 'unknown'))
+        logger.info(f"Tools: {tool_names}")
+        
+        # The config object is only replaced when the file changes, so the
+        # converted tools can be reused for every file in a batch.
+        cached = self._tools_cache.get(assistant_json_path)
+        if cached is not None and cached[0] is assistant_data:
+            formatted_tools = cached[1]
+        else:
+            # Convert tools to Responses API format
+            formatted_tools = self.convert_tools_format(tools) if tools else None
+            self._tools_cache[assistant_json_path] = (assistant_data, formatted_tools)
+        
+        return {
+            "assistant_id": assistant_id,
+            "assistant_name": assistant_name,
+            "model": model,
+            "instructions": instructions,
+            "tools": formatted_tools,
+            "sampling": sampling,
+        }
+    
+    def _is_static_message(self, user_message: str) -> bool:
+        """Whether a batch-wide user message is long enough to send as instructions"""
+        return len(user_message or "") // 4 >= _STATIC_MESSAGE_MIN_TOKENS
+    
+    def _format_result(self, prepared: Dict, response: Dict) -> dict:
+        """Shape a get_assistant_response result into the process_request result"""
+        return {
+            "assistant": {
+                "id": prepared["assistant_id"],
+                "name": prepared["assistant_name"],
+                "model": prepared["model"]
+            },
+            "response_id": response['response_id'],
+            "conversation_id": response.get('conversation_id'),
+            "status": response['status'],
+            "text": response['text']
+        }
+    
     def process_request(self, 
                        assistant_json_path: str,
                        user_message: str, 
                        file_paths: Optional[List[str]] = None,
                        use_conversation: bool = False,
                        conversation_id: Optional[str] = None,
-                       output_dir: Optional[str] = None) -> dict:
+                       output_dir: Optional[str] = None,
+                       extra_file_ids: Optional[Dict[str, str]] = None,
+                       extra_instructions: Optional[str] = None) -> dict:
         """
         Process a user request using assistant from JSON file
         
@@ -101,72 +231,89 @@ class AssistantIntegration:
             file_paths: Optional list of file paths to attach
             use_conversation: Whether to use stateful conversation (default: True)
             conversation_id: Optional existing conversation ID
+            extra_file_ids: Optional already-uploaded attachments {local_path: file_id},
+                reused as-is (see OpenAIService.upload_files)
+            extra_instructions: Optional static text appended to the assistant
+                instructions (see process_batch)
             
         Returns:
             Dictionary with response and metadata
         """
         try:
-            # Load assistant configuration
-            logger.info(f"Loading assistant from {assistant_json_path}")
-            assistant_data = self.load_assistant_from_file(assistant_json_path)
-            
-            # Extract fields (matching MongoDB flow)
-            assistant_id = assistant_data.get('id', 'unknown')
-            assistant_name = assistant_data.get('name', 'Unknown Assistant')
-            model = assistant_data.get('model', 'gpt-4o')
-            instructions = assistant_data.get('instructions', 'You are a helpful assistant.')
-            
-            # Get tools from builtin_tools field
-            tools = assistant_data.get('builtin_tools', [])
-            
-            # Get sampling (temperature, top_p) if present
-            sampling = assistant_data.get('sampling')  # Can be None or {temperature, top_p}
-            
-            logger.info(f"Using assistant: {assistant_name}")
-            logger.info(f"Model: {model}")
-            # Handle both string and dict tool formats for logging
-            tool_names = []
-            for t in tools:
-                if isinstance(t, str):
-                    tool_names.append(t)
-                elif isinstance(t, dict):
-                    tool_names.append(t.get('type', 'unknown'))
-            logger.info(f"Tools: {tool_names}")
-            
-            # Convert tools to Responses API format
-            formatted_tools = self.convert_tools_format(tools) if tools else None
+            prepared = self._prepare_request(assistant_json_path, extra_instructions)
             
             # Call OpenAI Responses API with sampling
             logger.info("Calling OpenAI Responses API...")
             response = self.openai_service.get_assistant_response(
-                model=model,
-                instructions=instructions,
+                model=prepared["model"],
+                instructions=prepared["instructions"],
                 user_message=user_message,
-                tools=formatted_tools,
+                tools=prepared["tools"],
                 file_paths=file_paths,
                 use_conversation=use_conversation,
                 conversation_id=conversation_id,
-                sampling=sampling,  # Pass sampling to match MongoDB version
+                sampling=prepared["sampling"],  # Pass sampling to match MongoDB version
                 metadata={
-                    "assistant_id": assistant_id,
-                    "assistant_name": assistant_name
+                    "assistant_id": prepared["assistant_id"],
+                    "assistant_name": prepared["assistant_name"]
                 },
                 output_dir=output_dir,
+                extra_file_ids=extra_file_ids,
+                # Paced once the full prompt (instructions + Excel dump) is known
+                acquire_tokens=self.rate_limiter.acquire,
             )
             
-            # Format response
-            result = {
-                "assistant": {
-                    "id": assistant_id,
-                    "name": assistant_name,
-                    "model": model
+            result = self._format_result(prepared, response)
+            logger.info("Request processed successfully")
+            return result
+            
+        except Exception as e:
+            logger.error(f"Error processing request: {e}")
+            raise
+    
+    async def process_request_async(self,
+                                    openai_service: AsyncOpenAIService,
+                                    assistant_json_path: str,
+                                    user_message: str,
+                                    file_paths: Optional[List[str]] = None,
+                                    use_conversation: bool = False,
+                                    conversation_id: Optional[str] = None,
+                                    output_dir: Optional[str] = None,
+                                    extra_file_ids: Optional[Dict[str, str]] = None,
+                                    extra_instructions: Optional[str] = None) -> dict:
+        """
+        Async counterpart of process_request, driven by an AsyncOpenAIService
+        
+        Args:
+            openai_service: Async service bound to the running event loop
+            (remaining arguments as in process_request)
+            
+        Returns:
+            Dictionary with response and metadata
+        """
+        try:
+            prepared = self._prepare_request(assistant_json_path, extra_instructions)
+            
+            logger.info("Calling OpenAI Responses API (async)...")
+            response = await openai_service.get_assistant_response(
+                model=prepared["model"],
+                instructions=prepared["instructions"],
+                user_message=user_message,
+                tools=prepared["tools"],
+                file_paths=file_paths,
+                use_conversation=use_conversation,
+                conversation_id=conversation_id,
+                sampling=prepared["sampling"],
+                metadata={
+                    "assistant_id": prepared["assistant_id"],
+                    "assistant_name": prepared["assistant_name"]
                 },
-                "response_id": response['response_id'],
-                "conversation_id": response.get('conversation_id'),
-                "status": response['status'],
-                "text": response['text']
-            }
+                output_dir=output_dir,
+                extra_file_ids=extra_file_ids,
+                acquire_tokens=self.rate_limiter.acquire_async,
+            )
             
+            result = self._format_result(prepared, response)
             logger.info("Request processed successfully")
             return result
             
@@ -183,132 +330,508 @@ class AssistantIntegration:
             output_file: Output file path
         """
         try:
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(response, f, indent=2, ensure_ascii=False)
+            Path(output_file).write_bytes(orjson.dumps(response, option=orjson.OPT_INDENT_2))
             logger.info(f"Response saved to {output_file}")
         except Exception as e:
             logger.error(f"Error saving response: {e}")
             raise
     
+    def _build_multi_message(self, user_message: str, filenames: List[str]) -> str:
+        """Wrap the per-file instructions so one request carries several independent files"""
+        lines = [
+            (user_message or "").strip(),
+            "",
+            f"This request contains {len(filenames)} input files. Treat each file as a separate, "
+            "independent task and produce a separate output file for each one, named after its input file:",
+        ]
+        lines.extend(f"<<FILE id={i} name={name}>>" for i, name in enumerate(filenames, 1))
+        lines.append(
+            "Report the result for each file between <<RESULT id=N>> and <<END>> markers, "
+            "using the id of the file it belongs to."
+        )
+        return "\n".join(lines)
+    
+    def _split_multi_result(self, result: dict, filenames: List[str]) -> List[dict]:
+        """Split a multiplexed response into one batch result per input file"""
+        sections = {int(m.group(1)): m.group(2).strip() for m in _MULTI_RESULT_RE.finditer(result.get('text') or "")}
+        per_file = []
+        for i, name in enumerate(filenames, 1):
+            if i not in sections:
+                per_file.append({
+                    "input_file": name,
+                    "status": "error",
+                    "error": f"No <<RESULT id={i}>> section in response {result.get('response_id')}",
+                })
+                continue
+            per_file.append({
+                "input_file": name,
+                "status": "success",
+                "response": {**result, "text": sections[i]},
+            })
+        return per_file
+    
+    def process_request_multi(self,
+                              assistant_json_path: str,
+                              user_message: str,
+                              file_paths: List[str],
+                              extra_file_ids: Optional[Dict[str, str]] = None,
+                              use_conversation: bool = False,
+                              output_dir: Optional[str] = None,
+                              extra_instructions: Optional[str] = None) -> List[dict]:
+        """
+        Process several Excel files in a single Responses API call
+        
+        The files share one copy of the instructions and user message; the
+        assistant reports each file's result in its own <<RESULT id=N>> section.
+        
+        Args:
+            assistant_json_path: Path to assistant JSON file
+            user_message: Message applied to every file
+            file_paths: Excel files handled as independent tasks
+            extra_file_ids: Optional already-uploaded attachments {local_path: file_id}
+            use_conversation: Whether to use stateful conversation
+            output_dir: Where to save files returned by the assistant
+            extra_instructions: Optional static text appended to the assistant instructions
+            
+        Returns:
+            One batch result per file, in file_paths order
+        """
+        filenames = [os.path.basename(p) for p in file_paths]
+        result = self.process_request(
+            assistant_json_path=assistant_json_path,
+            user_message=self._build_multi_message(user_message, filenames),
+            file_paths=file_paths,
+            use_conversation=use_conversation,
+            output_dir=output_dir,
+            extra_file_ids=extra_file_ids,
+            extra_instructions=extra_instructions,
+        )
+        return self._split_multi_result(result, filenames)
+    
+    async def process_request_multi_async(self,
+                                          openai_service: AsyncOpenAIService,
+                                          assistant_json_path: str,
+                                          user_message: str,
+                                          file_paths: List[str],
+                                          extra_file_ids: Optional[Dict[str, str]] = None,
+                                          use_conversation: bool = False,
+                                          output_dir: Optional[str] = None,
+                                          extra_instructions: Optional[str] = None) -> List[dict]:
+        """Async counterpart of process_request_multi"""
+        filenames = [os.path.basename(p) for p in file_paths]
+        result = await self.process_request_async(
+            openai_service=openai_service,
+            assistant_json_path=assistant_json_path,
+            user_message=self._build_multi_message(user_message, filenames),
+            file_paths=file_paths,
+            use_conversation=use_conversation,
+            output_dir=output_dir,
+            extra_file_ids=extra_file_ids,
+            extra_instructions=extra_instructions,
+        )
+        return self._split_multi_result(result, filenames)
+    
+    def _scan_excel_files(self, input_folder: str) -> Dict[str, Dict]:
+        """
+        Find all Excel files in the folder together with their mtime and size
+        
+        The stat data comes from the directory scan itself (DirEntry.stat() is
+        answered from the directory listing on Windows and cached per entry),
+        so there is no second stat pass over the files.
+        
+        Args:
+            input_folder: Folder to scan (not recursive)
+            
+        Returns:
+            Mapping of file path -> {"mtime", "size"}, sorted by path
+        """
+        with os.scandir(input_folder) as entries:
+            found = [
+                entry for entry in entries
+                if entry.name.lower().endswith(_EXCEL_SUFFIXES) and entry.is_file()
+            ]
+        found.sort(key=lambda entry: entry.path)
+        stats = {}
+        for entry in found:
+            st = entry.stat()
+            stats[entry.path] = {"mtime": st.st_mtime, "size": st.st_size}
+        return stats
+    
+    @staticmethod
+    def _run_fields(assistant_json_path: str, user_message: str,
+                    output_dir: Optional[str]) -> Dict[str, Optional[str]]:
+        """
+        Fields stored with every result so a resumed run only reuses results
+        produced with the same assistant file, message and output folder
+        
+        Returns:
+            {"config_hash": sha256 of the assistant file + user message,
+             "output_dir": absolute output folder or None}
+        """
+        digest = hashlib.sha256()
+        with open(assistant_json_path, 'rb') as f:
+            digest.update(f.read())
+        digest.update(b"\0")
+        digest.update((user_message or "").encode("utf-8"))
+        return {
+            "config_hash": digest.hexdigest(),
+            "output_dir": os.path.abspath(output_dir) if output_dir else None,
+        }
+    
     def process_batch(self,
                      assistant_json_path: str,
                      input_folder: str,
                      user_message: str,
-                     use_conversation: bool = True,
+                     use_conversation: bool = False,
                      extra_attachments: Optional[List[str]] = None,
-                     output_dir: Optional[str] = None) -> List[dict]:
+                     output_dir: Optional[str] = None,
+                     results_log_path: Optional[str] = None,
+                     resume: bool = True,
+                     workers: Optional[int] = None) -> List[dict]:
         """
         Process multiple Excel files from a folder
         
         Args:
             assistant_json_path: Path to assistant JSON file
             input_folder: Path to folder containing Excel files
-            user_message: Message to send with each file
-            use_conversation: Whether to use conversation (creates new conversation per file)
+            user_message: Message to send with each file. The same text applies to
+                every file, so when it is long (>= _STATIC_MESSAGE_MIN_TOKENS) it is
+                sent as part of the instructions and each request only names its
+                file; put per-file context in the files, not in this message.
+            use_conversation: Whether to use conversation (creates new conversation per file).
+                Defaults to False: conversations are never reused across files, and
+                creating one adds a sequential API round-trip before every request.
+            extra_attachments: Optional files attached to every request (e.g. mapping txt);
+                uploaded once for the whole batch and deleted when it finishes
+            results_log_path: Optional JSON Lines file; each result is appended and
+                flushed as soon as its file finishes (completion order) to
+                <results_log_path>.tmp, which replaces results_log_path when the run ends
+            resume: Reuse successful results from an existing results_log_path for
+                files whose path, mtime and size are unchanged and that were processed
+                with the same assistant file, message and output_dir, instead of
+                calling OpenAI again
+            workers: Requests kept in flight at once (default: BATCH_WORKERS)
             
         Returns:
             List of results for each processed file
         """
         results = []
         
-        # Find all Excel files in the folder
-        excel_patterns = ['*.xlsx', '*.xls']
-        excel_files = []
-        
-        for pattern in excel_patterns:
-            excel_files.extend(glob.glob(os.path.join(input_folder, pattern)))
+        file_stats = self._scan_excel_files(input_folder)
+        excel_files = list(file_stats)
         
         if not excel_files:
             logger.warning(f"No Excel files found in {input_folder}")
             return results
         
-        logger.info(f"Found {len(excel_files)} Excel file(s) to process")
-        logger.info("=" * 80)
+        run_fields = self._run_fields(assistant_json_path, user_message, output_dir)
+        for fp, stats in file_stats.items():
+            stats.update(input_path=os.path.abspath(fp), **run_fields)
         
-        def _process_one(index_and_path: Tuple[int, str]) -> Dict:
-            idx, file_path = index_and_path
-            filename = os.path.basename(file_path)
-            logger.info(f"\n{'=' * 80}")
-            logger.info(f"Processing file {idx}/{len(excel_files)}: {filename}")
-            logger.info("=" * 80)
+        log_event(logger, "batch_start", input_folder=input_folder, files=len(excel_files),
+                  message_chars=len(user_message or ""))
+        
+        # Results from a previous run of this batch, reused for unchanged inputs
+        reused: Dict[str, Dict] = {}
+        log_tmp_path = f"{results_log_path}.tmp" if results_log_path else None
+        if resume and results_log_path:
+            previous: Dict[str, Dict] = {}
+            # A leftover .tmp is the log of a run that was killed before finishing
+            for path in (results_log_path, log_tmp_path):
+                if os.path.exists(path):
+                    previous.update(_load_results_log(path))
+            for fp in excel_files:
+                stats = file_stats[fp]
+                prev = previous.get(stats["input_path"])
+                if (prev and prev.get("status") == "success"
+                        and all(prev.get(k) == v for k, v in stats.items())):
+                    reused[fp] = prev
+            if reused:
+                logger.info(f"Resuming: {len(reused)} file(s) already processed, skipping them")
+        pending_files = [fp for fp in excel_files if fp not in reused]
+        
+        # A long batch-wide message is really instructions: send it once as part
+        # of the instructions (an identical prefix on every request, which
+        # OpenAI's prompt caching reuses) and keep the per-file user message short.
+        batch_instructions = user_message if self._is_static_message(user_message) else None
 
-            # Attach extra files (e.g., mapping txt) to every request, if provided
-            all_attachments = [file_path]
-            if extra_attachments:
-                for p in extra_attachments:
-                    if p and p not in all_attachments:
-                        all_attachments.append(p)
+        def _file_message(file_paths: List[str]) -> str:
+            if batch_instructions is None:
+                return user_message
+            if len(file_paths) == 1:
+                return f"Process the attached file: {os.path.basename(file_paths[0])}"
+            return "Process the attached files."
 
-            response = self.process_request(
-                assistant_json_path=assistant_json_path,
-                user_message=user_message,
-                file_paths=all_attachments,
-                use_conversation=use_conversation,
-                conversation_id=None,  # New conversation for each file
-                output_dir=output_dir,
-            )
+        def _log_start(idx: int, file_path: str) -> None:
+            logger.info("processing %d/%d %s", idx, len(pending_files), os.path.basename(file_path))
+
+        def _record(group_results: List[Dict]) -> List[Dict]:
+            if results_log is not None:
+                for r in group_results:
+                    results_log.write(orjson.dumps(r) + b"\n")
+                results_log.flush()
+            return group_results
+
+        def _error_results(group: List[Tuple[int, str]], e: Exception) -> List[Dict]:
+            out = []
+            for _, fp in group:
+                filename = os.path.basename(fp)
+                logger.error(f"✗ Error processing {filename}: {e}")
+                out.append({"input_file": filename, "status": "error", "error": str(e), **file_stats[fp]})
+            return _record(out)
 
+        def _log_done(group: List[Tuple[int, str]], group_results: List[Dict]) -> List[Dict]:
+            for (_, fp), r in zip(group, group_results):
+                # Persisted so a later run can tell whether the input changed
+                r.update(file_stats[fp])
+                if r["status"] == "success":
+                    logger.info(f"✓ Successfully processed {r['input_file']}")
+                else:
+                    logger.error(f"✗ Error processing {r['input_file']}: {r.get('error')}")
+            return _record(group_results)
+
+        def _start_group(group: List[Tuple[int, str]]) -> Dict:
+            """Log the group's files and build its process_request(_multi) arguments"""
+            for idx, fp in group:
+                _log_start(idx, fp)
+            file_paths = [fp for _, fp in group]
+            # No conversation_id: each request starts its own conversation
             return {
-                "input_file": filename,
-                "status": "success",
-                "response": response
+                "assistant_json_path": assistant_json_path,
+                "user_message": _file_message(file_paths),
+                "file_paths": file_paths,
+                "use_conversation": use_conversation,
+                "output_dir": output_dir,
+                "extra_file_ids": shared_file_ids,
+                "extra_instructions": batch_instructions,
             }
 
-        workers = max(1, int(BATCH_WORKERS or 1))
-        if workers == 1:
-            # Sequential processing (original behavior)
-            for idx, file_path in enumerate(excel_files, 1):
-                filename = os.path.basename(file_path)
+        def _finish_group(group: List[Tuple[int, str]], response) -> List[Dict]:
+            """Shape a process_request result (one file) or process_request_multi results"""
+            if len(group) == 1:
+                response = [{
+                    "input_file": os.path.basename(group[0][1]),
+                    "status": "success",
+                    "response": response
+                }]
+            return _log_done(group, response)
+
+        def _process_group(group: List[Tuple[int, str]]) -> List[Dict]:
+            request = _start_group(group)
+            call = self.process_request if len(group) == 1 else self.process_request_multi
+            try:
+                return _finish_group(group, call(**request))
+            except Exception as e:
+                return _error_results(group, e)
+
+        async def _process_all_async(workers: int) -> List[Dict]:
+            # One event loop thread; `workers` consumers pull groups from a
+            # shared iterator, so at most `workers` requests are in flight and
+            # only `workers` tasks exist regardless of batch size.
+            # Pool follows the actual worker count (--workers may exceed BATCH_WORKERS)
+            service = AsyncOpenAIService(pool_size=workers * 2)
+            pending = iter(enumerate(groups))
+            # One slot per group keeps output order stable (same as excel_files order)
+            ordered_results: List[Optional[List[Dict]]] = [None] * len(groups)
+
+            async def _run_group(group: List[Tuple[int, str]]) -> List[Dict]:
+                request = _start_group(group)
+                call = self.process_request_async if len(group) == 1 else self.process_request_multi_async
                 try:
-                    result = _process_one((idx, file_path))
-                    results.append(result)
-                    logger.info(f"✓ Successfully processed {filename}")
+                    return _finish_group(group, await call(service, **request))
                 except Exception as e:
-                    logger.error(f"✗ Error processing {filename}: {e}")
-                    results.append({"input_file": filename, "status": "error", "error": str(e)})
-        else:
-            logger.info(f"Running batch with parallel workers: {workers}")
-            # Keep output order stable (same as excel_files order)
-            ordered_results: List[Optional[Dict]] = [None] * len(excel_files)
-            with ThreadPoolExecutor(max_workers=workers) as executor:
-                future_to_index = {
-                    executor.submit(_process_one, (i, fp)): (i, fp)
-                    for i, fp in enumerate(excel_files, 1)
-                }
-                for future in as_completed(future_to_index):
-                    i, fp = future_to_index[future]
-                    filename = os.path.basename(fp)
-                    try:
-                        res = future.result()
-                        logger.info(f"✓ Successfully processed {filename}")
-                    except Exception as e:
-                        logger.error(f"✗ Error processing {filename}: {e}")
-                        res = {"input_file": filename, "status": "error", "error": str(e)}
-                    ordered_results[i - 1] = res
-
-            results = [r for r in ordered_results if r is not None]
+                    return _error_results(group, e)
+
+            async def _consume() -> None:
+                for slot, group in pending:
+                    # _run_group turns every exception into error results, so each
+                    # slot is always filled before the next group is pulled.
+                    ordered_results[slot] = await _run_group(group)
+
+            try:
+                await asyncio.gather(*(_consume() for _ in range(min(workers, len(groups)))))
+                # A missing slot is a bug, not a file to drop silently
+                assert all(group_results is not None for group_results in ordered_results)
+                return [r for group_results in ordered_results for r in group_results]
+            finally:
+                await service.aclose()
+
+        # Group files into requests: BATCH_FILES_PER_REQUEST > 1 multiplexes
+        # several files into one Responses call to save requests against RPM.
+        per_request = BATCH_FILES_PER_REQUEST
+        indexed = list(enumerate(pending_files, 1))
+        groups = [indexed[i:i + per_request] for i in range(0, len(indexed), per_request)]
+        if per_request > 1:
+            logger.info(f"Multiplexing up to {per_request} files per request ({len(groups)} request(s))")
+
+        shared_paths = [p for p in (extra_attachments or []) if p and p not in excel_files]
+        shared_file_ids: Dict[str, str] = {}
+
+        # The new log is written next to the previous one and only replaces it
+        # when the run ends, so a failure can never lose earlier results
+        results_log = None
+        if results_log_path:
+            log_dir = os.path.dirname(results_log_path)
+            if log_dir:
+                os.makedirs(log_dir, exist_ok=True)
+            results_log = open(log_tmp_path, 'wb')
+
+        workers = max(1, workers) if workers else BATCH_WORKERS
+        try:
+            # Carry reused results into the new log so it stays a complete record
+            _record(list(reused.values()))
+            # Extra files (e.g., mapping txt) are the same for every request:
+            # upload them once and attach the same file IDs to each call.
+            # Inside the try so the finally deletes them whatever fails next.
+            if shared_paths and groups:
+                shared_file_ids = self.openai_service.upload_files(shared_paths)
+            if not groups:
+                logger.info("All files already processed")
+            elif workers == 1:
+                # Sequential processing (original behavior)
+                for group in groups:
+                    results.extend(_process_group(group))
+            else:
+                logger.info(f"Running batch with async concurrency: {workers}")
+                results = asyncio.run(_process_all_async(workers))
+        finally:
+            if results_log is not None:
+                results_log.close()
+                os.replace(log_tmp_path, results_log_path)
+            self.openai_service.delete_files(list(set(shared_file_ids.values())))
         
-        # Summary
-        logger.info("\n" + "=" * 80)
-        logger.info("BATCH PROCESSING SUMMARY")
-        logger.info("=" * 80)
+        if reused:
+            # Merge back into excel_files order
+            processed = iter(results)
+            results = [reused[fp] if fp in reused else next(processed) for fp in excel_files]
         
+        # Summary
         successful = sum(1 for r in results if r['status'] == 'success')
         failed = sum(1 for r in results if r['status'] == 'error')
-        
-        logger.info(f"Total files: {len(excel_files)}")
-        logger.info(f"Successful: {successful}")
-        logger.info(f"Failed: {failed}")
+        log_event(logger, "batch_summary", total=len(excel_files), successful=successful,
+                  failed=failed, reused=len(reused))
         
         return results
 
+    def process_batch_offline(self,
+                              assistant_json_path: str,
+                              input_folder: str,
+                              user_message: str,
+                              extra_attachments: Optional[List[str]] = None,
+                              output_dir: Optional[str] = None,
+                              max_wait: int = 24 * 3600) -> List[dict]:
+        """
+        Process multiple Excel files from a folder as one OpenAI Batch API job
+        
+        All requests are submitted together and polled as a single batch, which
+        avoids per-request latency and RPM limits (at half the cost) in exchange
+        for completion within the 24h batch window. Results use the same schema
+        as process_batch.
+        
+        Args:
+            assistant_json_path: Path to assistant JSON file
+            input_folder: Path to folder containing Excel files
+            user_message: Message to send with each file
+            extra_attachments: Optional files attached to every request (e.g. mapping txt)
+            output_dir: Where to save files returned by the assistant
+            max_wait: Maximum seconds to wait for the batch to finish
+            
+        Returns:
+            List of results for each processed file
+        """
+        file_stats = self._scan_excel_files(input_folder)
+        excel_files = list(file_stats)
+        if not excel_files:
+            logger.warning(f"No Excel files found in {input_folder}")
+            return []
+        run_fields = self._run_fields(assistant_json_path, user_message, output_dir)
+        for fp, stats in file_stats.items():
+            stats.update(input_path=os.path.abspath(fp), **run_fields)
+        
+        logger.info(f"Found {len(excel_files)} Excel file(s) to submit as one batch")
+        # Same static-message handling as process_batch
+        batch_instructions = user_message if self._is_static_message(user_message) else None
+        prepared = self._prepare_request(assistant_json_path, batch_instructions)
+        service = self.openai_service
+        shared_ids: Dict[str, str] = {}
+        
+        try:
+            # Shared attachments are uploaded once and referenced by every request
+            shared_paths = [p for p in (extra_attachments or []) if p]
+            shared_ids = service.upload_files(shared_paths)
+            
+            requests = []
+            for file_path in excel_files:
+                file_message = (
+                    f"Process the attached file: {os.path.basename(file_path)}"
+                    if batch_instructions is not None else user_message
+                )
+                requests.append({
+                    "custom_id": os.path.basename(file_path),
+                    "model": prepared["model"],
+                    "instructions": prepared["instructions"],
+                    "user_message": file_message,
+                    "tools": prepared["tools"],
+                    "sampling": prepared["sampling"],
+                    "file_paths": [file_path],
+                    "extra_file_ids": {p: i for p, i in shared_ids.items() if p != file_path},
+                })
+            
+            outcomes = service.get_assistant_response_batch(
+                requests,
+                metadata={"assistant_id": str(prepared["assistant_id"])},
+                output_dir=output_dir,
+                max_wait=max_wait,
+            )
+            
+            results = []
+            for file_path in excel_files:
+                filename = os.path.basename(file_path)
+                outcome = outcomes[filename]
+                if "error" in outcome:
+                    logger.error(f"✗ Error processing {filename}: {outcome['error']}")
+                    results.append({"input_file": filename, "status": "error", "error": outcome["error"],
+                                    **file_stats[file_path]})
+                    continue
+                
+                results.append({
+                    "input_file": filename,
+                    "status": "success",
+                    "response": self._format_result(prepared, outcome),
+                    **file_stats[file_path],
+                })
+                logger.info(f"✓ Successfully processed {filename}")
+            
+            return results
+        finally:
+            shared_file_ids = list(dict.fromkeys(shared_ids.values()))
+            if shared_file_ids:
+                logger.info(f"Cleaning up {len(shared_file_ids)} shared attachment(s)")
+                service.delete_files(shared_file_ids)
+
+
+_INTEGRATION: Optional[AssistantIntegration] = None
+
+
+def get_integration() -> AssistantIntegration:
+    """
+    Return the process-wide AssistantIntegration, creating it on first use.
+    Reusing it keeps one OpenAI client and its pooled, pre-warmed connections
+    for every batch and single-file call in the process.
+    """
+    global _INTEGRATION
+    if _INTEGRATION is None:
+        _INTEGRATION = AssistantIntegration()
+        _INTEGRATION.openai_service.warm_up()
+    return _INTEGRATION
+
 
 def main():
     """
     Main function - supports both single file and batch processing
     """
     # Initialize integration
-    integration = AssistantIntegration()
+    integration = get_integration()
     
     # Configuration
     BATCH_MODE = True  # Set to True for batch processing, False for single file
@@ -335,7 +858,7 @@ Check the attachment of Key words of web searches report. For each term, assign
                 assistant_json_path=assistant_json_path,
                 input_folder=input_folder,
                 user_message=user_message,
-                use_conversation=True
+                use_conversation=False
             )
             
             # Save batch results
@@ -8,41 +8,79 @@ Usage:
   python merge_assistant2_output.py
   python merge_assistant2_output.py --input-folder "C:\path\assistant2_output"
   python merge_assistant2_output.py --output "C:\path\merged.xlsx"
+  python merge_assistant2_output.py --output-parquet "C:\path\merged.parquet"
 """
 from __future__ import annotations
 
 import argparse
+import mmap
+import os
 import sys
-from datetime import date, timedelta
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from functools import lru_cache
+from importlib.util import find_spec
+from operator import itemgetter
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional, Tuple
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
 
 SCRIPT_DIR = Path(__file__).resolve().parent
 if str(SCRIPT_DIR) not in sys.path:
     sys.path.insert(0, str(SCRIPT_DIR))
 
-from chat_notifier import send_chat_message
+from date_utils import last_monday
 
-import pandas as pd
+# pandas, openpyxl, pyarrow and chat_notifier are imported where they are
+# used, so --help and argument errors return without loading them.
+if TYPE_CHECKING:
+    import pandas as pd
+    from openpyxl import Workbook
 
+# Optional engines are only probed here, not imported
+_HAVE_PYARROW = find_spec("pyarrow") is not None  # else plain object columns
+_EXCEL_ENGINE: Optional[str] = "calamine" if find_spec("python_calamine") else None
 
-def last_monday(today: Optional[date] = None) -> date:
-    today = today or date.today()
-    return today - timedelta(days=today.weekday())
+# Contiguous UTF-8 buffers instead of one Python object per cell
+_STRING_DTYPE: Optional[str] = "string[pyarrow]" if _HAVE_PYARROW else None
 
 
 TARGET_COLUMNS: Tuple[str, str, str] = ("keyword", "U_line", "Item")
 
+# Columns whose values repeat across rows and files (dictionary-encoded)
+_DICT_COLUMNS: Tuple[str, str] = ("keyword", "U_line")
 
+# Cell text that means "no value" in chunk files
+_NAN_TOKENS = frozenset({"nan", "None", "NaN", "NONE", "none", ""})
+
+# Below this many files, worker process start-up costs more than it saves
+_PARALLEL_MIN_FILES = 4
+
+# Memory-mapping only pays off once a workbook is past a few MB
+_MMAP_MIN_BYTES = 4 * 1024 * 1024
+
+_EXCEL_SUFFIXES = frozenset({".xlsx", ".xlsm", ".xls"})
+# Earlier merge outputs that may sit in the input folder
+_SKIP_NAMES = frozenset({"merged.xlsx", "merged_output.xlsx"})
+
+# Cell strings pd.read_excel treats as missing by default; the fast loader
+# applies the same set so merged output does not depend on the read path.
+_DEFAULT_NA_STRINGS = frozenset({
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan",
+    "1.#IND", "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a",
+    "nan", "null",
+})
+
+
+@lru_cache(maxsize=1024)
 def _normalize_col(col: str) -> str:
+    # Header names repeat across chunk files, so normalization is memoized
     return "".join(str(col).strip().lower().split())
 
 
-def _build_column_map(columns: Iterable[str]) -> Dict[str, str]:
-    existing = list(columns)
-    normalized = {_normalize_col(c): c for c in existing}
-
-    keyword_candidates = [
+_KEYWORD_NORMS: Tuple[str, ...] = tuple(
+    _normalize_col(c)
+    for c in (
         "keyword",
         "key word",
         "key_word",
@@ -51,120 +89,396 @@ def _build_column_map(columns: Iterable[str]) -> Dict[str, str]:
         "keywrd",
         "keyword(s)",
         "keywor d",
-    ]
-    line_candidates = ["u_line", "uline", "line", "u line", "u-line"]
-    item_candidates = ["item", "items"]
+    )
+)
+_LINE_NORMS: Tuple[str, ...] = tuple(_normalize_col(c) for c in ("u_line", "uline", "line", "u line", "u-line"))
+_ITEM_NORMS: Tuple[str, ...] = tuple(_normalize_col(c) for c in ("item", "items"))
+
+
+class _SourceColumns(NamedTuple):
+    """Source header for each of TARGET_COLUMNS (None when the file lacks it)"""
+
+    keyword: Optional[str]
+    U_line: Optional[str]
+    Item: Optional[str]
+
+    def present(self) -> List[str]:
+        return [src for src in self if src is not None]
 
-    def pick(cands: List[str]) -> str | None:
-        for cand in cands:
-            key = _normalize_col(cand)
+
+def _build_column_map(columns: Iterable[str]) -> _SourceColumns:
+    normalized = {_normalize_col(c): c for c in columns}
+
+    def pick(norms: Tuple[str, ...]) -> str | None:
+        for key in norms:
             if key in normalized:
                 return normalized[key]
         return None
 
-    keyword_col = pick(keyword_candidates)
-    line_col = pick(line_candidates)
-    item_col = pick(item_candidates)
+    return _SourceColumns(pick(_KEYWORD_NORMS), pick(_LINE_NORMS), pick(_ITEM_NORMS))
+
+
+def _cell_value(value):
+    # Match pd.read_excel: NA strings become missing and whole floats
+    # become ints (so 3.0 is written back as "3", not "3.0").
+    if isinstance(value, str):
+        return None if value in _DEFAULT_NA_STRINGS else value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _header_names(header: Tuple, width: int) -> List[str]:
+    # Same naming as pandas: blank headers become "Unnamed: i" and repeated
+    # names get ".1", ".2", ... suffixes.
+    names: List[str] = []
+    seen: Dict[str, int] = {}
+    for i in range(width):
+        value = _cell_value(header[i]) if i < len(header) else None
+        name = f"Unnamed: {i}" if value is None else str(value)
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def _read_xlsx_projected(path: Path) -> Tuple[pd.DataFrame, _SourceColumns]:
+    """
+    Read an .xlsx with openpyxl in read-only mode, streaming rows instead of
+    loading the workbook DOM. The header row is resolved with
+    _build_column_map first, and only the mapped source columns are
+    materialized (as Python objects; callers convert them to str).
+    Large files are memory-mapped so zip member reads come straight from the
+    page cache instead of being copied through file read buffers.
+    """
+    from openpyxl import load_workbook
+
+    with ExitStack() as stack:
+        source = path
+        if path.stat().st_size > _MMAP_MIN_BYTES:
+            fh = stack.enter_context(open(path, "rb"))
+            source = stack.enter_context(mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ))
+        return _read_xlsx_rows(load_workbook(source, read_only=True, data_only=True))
+
+
+def _read_xlsx_rows(wb: Workbook) -> Tuple[pd.DataFrame, _SourceColumns]:
+    """Collect the mapped columns from the first sheet, then close the workbook"""
+    import pandas as pd
 
-    mapping: Dict[str, str] = {}
-    if keyword_col:
-        mapping[keyword_col] = "keyword"
-    if line_col:
-        mapping[line_col] = "U_line"
-    if item_col:
-        mapping[item_col] = "Item"
-    return mapping
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return pd.DataFrame(), _SourceColumns(None, None, None)
+        # Header width is enough for name resolution; data cells beyond it
+        # could only ever land in unnamed columns, which are never kept.
+        names = _header_names(header, len(header))
+        sources = _build_column_map(names)
+        keep = [(names.index(src), src) for src in sources.present()]
+
+        n_rows = 0
+        last_with_data = 0
+        data: Dict[str, List] = {src: [] for _, src in keep}
+        for row in rows:
+            n_rows += 1
+            if any(v is not None and v != "" for v in row):
+                last_with_data = n_rows
+            for i, src in keep:
+                data[src].append(_cell_value(row[i]) if i < len(row) else None)
+    finally:
+        wb.close()
+
+    # Like pd.read_excel, trailing empty rows are trimmed (interior ones are kept)
+    if last_with_data < n_rows:
+        n_rows = last_with_data
+        for values in data.values():
+            del values[n_rows:]
+
+    return pd.DataFrame(data, index=range(n_rows), dtype=object), sources
+
+
+def _read_projected(path: Path) -> Tuple[pd.DataFrame, _SourceColumns]:
+    """Read only the keyword/U_line/Item source columns of a chunk file"""
+    import pandas as pd
+
+    if _EXCEL_ENGINE:
+        # The Rust parser reads a whole sheet faster than openpyxl streams
+        # three columns, so parse once and project afterwards
+        df = pd.read_excel(path, dtype=str, engine=_EXCEL_ENGINE)
+        sources = _build_column_map(df.columns)
+        return df[sources.present()], sources
+    if path.suffix.lower() == ".xlsx":
+        return _read_xlsx_projected(path)
+    # .xls/.xlsm: peek at the header, then parse just the mapped columns
+    sources = _build_column_map(pd.read_excel(path, nrows=0).columns)
+    if not sources.present():
+        return pd.read_excel(path, dtype=str).iloc[:, :0], sources
+    return pd.read_excel(path, dtype=str, usecols=sources.present()), sources
 
 
 def _iter_excel_files(folder: Path, recursive: bool) -> List[Path]:
-    patterns = ["*.xlsx", "*.xlsm", "*.xls"]
-    files: List[Path] = []
-    for pat in patterns:
-        files.extend(folder.rglob(pat) if recursive else folder.glob(pat))
-
-    cleaned: List[Path] = []
-    for f in files:
-        name = f.name.lower()
-        if name.startswith("~$"):
+    # One scandir walk classifies every entry, instead of a glob per suffix
+    found: List[Tuple[str, Path]] = []
+    stack = [folder]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive:
+                        stack.append(entry.path)
+                    continue
+                name = entry.name.casefold()
+                if name.startswith("~$") or name in _SKIP_NAMES:
+                    continue
+                if os.path.splitext(name)[1] in _EXCEL_SUFFIXES:
+                    found.append((name, Path(entry.path)))
+
+    # Sort on the casefolded name computed above (no per-path str() in the key)
+    found.sort(key=itemgetter(0))
+    return [path for _, path in found]
+
+
+def _has_any_non_empty(series: pd.Series) -> bool:
+    # Short-circuit scan: usually returns on the first row
+    for value in series.to_numpy(copy=False):
+        if value is None:
             continue
-        if name in {"merged.xlsx", "merged_output.xlsx"}:
-            continue
-        cleaned.append(f)
+        text = str(value).strip()
+        if text and text.lower() not in _NAN_TOKENS:
+            return True
+    return False
+
+
+def _as_text(values: pd.Series) -> pd.Series:
+    """Blank out missing cells and stringify, skipping str() when already text"""
+    from pandas.api.types import is_string_dtype
 
-    cleaned.sort(key=lambda p: str(p).lower())
-    return cleaned
+    filled = values.fillna("")
+    # On object columns this is a C-level scan, far cheaper than str() per cell
+    if is_string_dtype(filled):
+        return filled
+    return filled.astype(str)
 
 
-def merge_folder(folder_path: str, output_path: str | None = None, recursive: bool = False) -> Path:
+def _read_and_project(file_path: Path) -> Tuple[Optional[pd.DataFrame], Optional[str]]:
+    """
+    Read one chunk file and project it to TARGET_COLUMNS.
+    Top-level (picklable) so merge_folder can run it in worker processes.
+
+    Returns:
+        (frame, None) for a usable file, or (None, skip reason)
+    """
+    import pandas as pd
+
+    try:
+        df, sources = _read_projected(file_path)
+    except Exception as e:
+        return None, f"read failed: {e}"
+
+    if len(df) == 0:
+        return None, "empty sheet"
+
+    # Columns are pulled straight from their source names; no renamed copy
+    cols: Dict[str, pd.Series] = {}
+    for c, src in zip(TARGET_COLUMNS, sources):
+        if src is not None:
+            cols[c] = _as_text(df[src])
+        else:
+            cols[c] = pd.Series("", index=df.index)
+        # keyword comes first: bail out before building the other columns
+        if c == "keyword" and not _has_any_non_empty(cols[c]):
+            return None, "missing keyword column"
+    out = pd.DataFrame(cols, copy=False)
+
+    if _STRING_DTYPE:
+        out = out.astype(_STRING_DTYPE)
+    return out, None
+
+
+def _rechunk(merged: pd.DataFrame) -> pd.DataFrame:
+    """
+    Collapse the per-file pieces left by pd.concat into contiguous columns.
+    Arrow columns keep one chunk per input file otherwise, which slows every
+    later string kernel; object columns are consolidated into one block.
+    """
+    if not _STRING_DTYPE:
+        return merged.copy()
+    import pyarrow as pa
+
+    for c in TARGET_COLUMNS:
+        arr = merged[c].array
+        chunked = arr._pa_array
+        if chunked.num_chunks > 1:
+            merged[c] = type(arr)(pa.chunked_array([chunked.combine_chunks()]))
+    return merged
+
+
+def _dictionary_encode(merged: pd.DataFrame) -> pd.DataFrame:
+    """
+    Store the heavily repeated columns as dictionary-encoded Arrow arrays:
+    each distinct string is kept once and rows hold int32 codes. Parquet
+    keeps the encoding; the xlsx writer still sees plain str values.
+    """
+    import pandas as pd
+    import pyarrow as pa
+
+    dict_dtype = pd.ArrowDtype(pa.dictionary(pa.int32(), pa.string()))
+    for c in _DICT_COLUMNS:
+        merged[c] = merged[c].astype(dict_dtype)
+    return merged
+
+
+def _concat_via_ipc(frames: Iterable[pd.DataFrame]) -> Optional[pd.DataFrame]:
+    """
+    Concatenate frames through a temporary Arrow IPC stream on disk.
+    Peak memory is one projected frame plus the final table, instead of
+    every frame plus the concat result.
+
+    Returns:
+        The merged frame (string[pyarrow] columns), or None if frames was empty
+    """
+    import pandas as pd
+    import pyarrow as pa
+
+    with tempfile.TemporaryDirectory(prefix="merge_spill_") as tmp:
+        spill_path = os.path.join(tmp, "frames.arrow")
+        writer = None
+        with pa.OSFile(spill_path, "wb") as sink:
+            for frame in frames:
+                table = pa.Table.from_pandas(frame, preserve_index=False)
+                if writer is None:
+                    writer = pa.ipc.new_stream(sink, table.schema)
+                writer.write_table(table)
+            if writer is None:
+                return None
+            writer.close()
+        # Read into memory (not memory_map) so the temp file can be removed
+        with pa.OSFile(spill_path, "rb") as source:
+            table = pa.ipc.open_stream(source).read_all()
+
+    string_dtype = pd.StringDtype("pyarrow")
+    return table.to_pandas(types_mapper={pa.string(): string_dtype, pa.large_string(): string_dtype}.get)
+
+
+def _write_xlsx(frame: pd.DataFrame, output_file: Path, sheet_name: str) -> None:
+    """
+    Stream rows into a write-only openpyxl workbook. Unlike DataFrame.to_excel
+    this keeps no per-cell objects or styles in memory; the header is plain text.
+    """
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(sheet_name)
+    ws.append([str(c) for c in frame.columns])
+    for row in frame.itertuples(index=False, name=None):
+        ws.append(row)
+    wb.save(output_file)
+
+
+def merge_folder(
+    folder_path: str,
+    output_path: str | None = None,
+    recursive: bool = False,
+    parquet_output: str | None = None,
+    write_xlsx: bool = True,
+    low_memory: bool = False,
+) -> Path:
+    """
+    Merge chunk files into one workbook and/or a Parquet file.
+
+    With low_memory (requires pyarrow), projected frames are streamed to a
+    temporary Arrow IPC file instead of being kept in a list until concat.
+
+    Returns the xlsx path, or the Parquet path when write_xlsx is False.
+    """
+    import pandas as pd
+
     folder = Path(folder_path).expanduser().resolve()
     if not folder.exists() or not folder.is_dir():
         raise SystemExit(f"[ERROR] Folder not found or not a directory: {folder}")
+    if parquet_output and not _HAVE_PYARROW:
+        raise SystemExit("[ERROR] Parquet output requires pyarrow (pip install pyarrow)")
+    if low_memory and not _HAVE_PYARROW:
+        raise SystemExit("[ERROR] --low-memory requires pyarrow (pip install pyarrow)")
+    if not write_xlsx and not parquet_output:
+        raise SystemExit("[ERROR] Nothing to write: xlsx output disabled and no Parquet path given")
 
     excel_files = _iter_excel_files(folder, recursive=recursive)
     if not excel_files:
         raise SystemExit(f"[ERROR] No Excel files found in: {folder}")
 
-    merged_frames: List[pd.DataFrame] = []
     skipped: List[Tuple[Path, str]] = []
-
-    for file_path in excel_files:
-        try:
-            df = pd.read_excel(file_path, dtype=str)
-        except Exception as e:
-            skipped.append((file_path, f"read failed: {e}"))
-            continue
-
-        if df.empty:
-            skipped.append((file_path, "empty sheet"))
-            continue
-
-        col_map = _build_column_map(df.columns)
-
-        out = pd.DataFrame(index=range(len(df)), columns=list(TARGET_COLUMNS))
-        for c in TARGET_COLUMNS:
-            out[c] = ""
-        renamed = df.rename(columns=col_map)
-
-        if "keyword" in renamed.columns:
-            out["keyword"] = renamed["keyword"].fillna("").astype(str)
-        if "U_line" in renamed.columns:
-            out["U_line"] = renamed["U_line"].fillna("").astype(str)
-        if "Item" in renamed.columns:
-            out["Item"] = renamed["Item"].fillna("").astype(str)
-
-        if out["keyword"].replace({"nan": ""}).astype(str).str.strip().eq("").all():
-            skipped.append((file_path, "missing keyword column"))
-            continue
-
-        for c in TARGET_COLUMNS:
-            out[c] = out[c].replace({"nan": "", "None": ""}).astype(str)
-
-        merged_frames.append(out)
-
-    if not merged_frames:
+    merged_count = 0
+
+    def usable_frames(results) -> Iterator[pd.DataFrame]:
+        nonlocal merged_count
+        for file_path, (out, reason) in zip(excel_files, results):
+            if out is None:
+                skipped.append((file_path, reason))
+            else:
+                merged_count += 1
+                yield out
+
+    with ExitStack() as stack:
+        if len(excel_files) < _PARALLEL_MIN_FILES:
+            results = map(_read_and_project, excel_files)
+        else:
+            # Parsing is CPU-bound and single-threaded per file: spread files over processes
+            ex = stack.enter_context(ProcessPoolExecutor())
+            results = ex.map(_read_and_project, excel_files, chunksize=4)
+
+        if low_memory:
+            # Each frame is spilled as it arrives, so only one is held at a time
+            merged = _concat_via_ipc(usable_frames(results))
+        else:
+            merged_frames = list(usable_frames(results))
+
+    if not merged_count:
         details = "\n".join([f"  - {p}: {reason}" for p, reason in skipped[:50]])
         raise SystemExit(f"[ERROR] No valid chunk files to merge in: {folder}\n{details}")
 
-    merged = pd.concat(merged_frames, ignore_index=True)
-
-    if not output_path:
-        output_file = folder / "merged.xlsx"
-    else:
-        output_file = Path(output_path).expanduser().resolve()
-        if output_file.exists() and output_file.is_dir():
-            output_file = output_file / "merged.xlsx"
-
-    output_file.parent.mkdir(parents=True, exist_ok=True)
-    merged.to_excel(output_file, index=False, sheet_name="Merged")
+    if not low_memory:
+        # With Arrow strings this appends chunks instead of copying Python objects
+        merged = pd.concat(merged_frames, ignore_index=True)
+    # One hash-set lookup over the merged columns instead of one per file
+    targets = list(TARGET_COLUMNS)
+    merged[targets] = merged[targets].mask(merged[targets].isin(_NAN_TOKENS), "")
+    merged = _rechunk(merged)
+    if _STRING_DTYPE:
+        merged = _dictionary_encode(merged)
+
+    output_file: Optional[Path] = None
+    if write_xlsx:
+        if not output_path:
+            output_file = folder / "merged.xlsx"
+        else:
+            output_file = Path(output_path).expanduser().resolve()
+            if output_file.exists() and output_file.is_dir():
+                output_file = output_file / "merged.xlsx"
+
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        _write_xlsx(merged, output_file, sheet_name="Merged")
+
+    parquet_file: Optional[Path] = None
+    if parquet_output:
+        parquet_file = Path(parquet_output).expanduser().resolve()
+        parquet_file.parent.mkdir(parents=True, exist_ok=True)
+        merged.to_parquet(parquet_file, engine="pyarrow", compression="zstd", index=False)
 
     print("=" * 80)
     print("MERGE COMPLETED")
     print("=" * 80)
     print(f"Input folder: {folder}")
     print(f"Excel files found: {len(excel_files)}")
-    print(f"Files merged: {len(merged_frames)}")
+    print(f"Files merged: {merged_count}")
     print(f"Rows merged: {len(merged)}")
-    print(f"Output: {output_file}")
+    if output_file:
+        print(f"Output: {output_file}")
+    if parquet_file:
+        print(f"Parquet output: {parquet_file}")
     if skipped:
         print("-" * 80)
         print(f"Skipped files: {len(skipped)} (showing up to 30)")
@@ -172,13 +486,7 @@ def merge_folder(folder_path: str, output_path: str | None = None, recursive: bo
             print(f"  - {p.name}: {reason}")
     print("=" * 80)
 
-    return output_file
-
-
-def merge_with_existing_script(input_folder: str, output_path: str) -> Path:
-    return merge_folder(input_folder, output_path=output_path, recursive=False)
-
-    return merge_folder(input_folder, output_path=output_path, recursive=False)
+    return output_file or parquet_file
 
 
 def main() -> None:
@@ -195,6 +503,18 @@ def main() -> None:
         default=None,
         help="Output Excel file path",
     )
+    parser.add_argument(
+        "--output-parquet",
+        default=None,
+        help="Also write the merged rows to this Parquet file (zstd). "
+        "Without --output, only the Parquet file is written.",
+    )
+    parser.add_argument(
+        "--low-memory",
+        action="store_true",
+        help="Spill each file to a temporary Arrow stream instead of holding all "
+        "of them in memory until the final concat (requires pyarrow)",
+    )
     args = parser.parse_args()
 
     default_input = SCRIPT_DIR / "data" / "assistant2_output"
@@ -203,9 +523,21 @@ def main() -> None:
 
     input_folder = str(Path(args.input_folder).expanduser().resolve()) if args.input_folder else str(default_input)
     output_path = str(Path(args.output).expanduser().resolve()) if args.output else str(default_output)
+    parquet_output = str(Path(args.output_parquet).expanduser().resolve()) if args.output_parquet else None
+    # --output-parquet on its own skips the (slow) xlsx serialization
+    write_xlsx = bool(args.output) or not parquet_output
+
+    from chat_notifier import send_chat_message
 
     try:
-        output_file = merge_with_existing_script(input_folder, output_path)
+        output_file = merge_folder(
+            input_folder,
+            output_path=output_path,
+            recursive=False,
+            parquet_output=parquet_output,
+            write_xlsx=write_xlsx,
+            low_memory=args.low_memory,
+        )
         print(f"[SUCCESS] Merged file created: {output_file}")
         send_chat_message(
             "\n".join(
@@ -1,71 +1,408 @@
 """
 OpenAI service for interacting with Responses API (Conversations)
 """
+import asyncio
+import hashlib
+import io
 import openai
+import orjson
 import time
 import logging
 import httpx
 import os
-from typing import Dict, Optional, List, Any
-from config import OPENAI_API_KEY, MAX_TOOL_ITERATIONS, MAX_TOOL_CALLS
+import tempfile
+import posixpath
+import zipfile
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+from functools import lru_cache
+from config import (
+    OPENAI_API_KEY, OPENAI_BASE_URL, MAX_TOOL_ITERATIONS, MAX_TOOL_CALLS, HTTPX_POOL,
+    OPENAI_COMPLETION_BUDGET_TOKENS, OPENAI_INPUT_SAFETY_TOKENS, OPENAI_TRIM_MARGIN_TOKENS,
+)
+from log_setup import configure_logging
 
-logging.basicConfig(level=logging.INFO)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 # Set OpenAI API key
 openai.api_key = OPENAI_API_KEY
 
 
-class OpenAIService:
-    """Service class for OpenAI Responses API operations"""
-    
-    def __init__(self):
-        """Initialize OpenAI service"""
-        self.client = openai.OpenAI(api_key=OPENAI_API_KEY)
-        logger.info("OpenAI Responses API service initialized")
-    
-    def create_conversation(self, metadata: Optional[Dict] = None) -> str:
-        """
-        Create a new conversation for stateful interactions
-        
-        Args:
-            metadata: Optional metadata for the conversation
-            
-        Returns:
-            Conversation ID
-        """
-        try:
-            conversation = self.client.conversations.create(
-                metadata=metadata or {}
-            )
-            logger.info(f"Created conversation: {conversation.id}")
-            return conversation.id
-        except Exception as e:
-            logger.error(f"Error creating conversation: {e}")
-            raise
+def _http_limits(pool_size: int = HTTPX_POOL) -> httpx.Limits:
+    """Connection pool sized so every batch worker can keep a live connection"""
+    return httpx.Limits(
+        max_connections=pool_size,
+        max_keepalive_connections=pool_size,
+        keepalive_expiry=60,
+    )
+
+
+# Fail fast on connect, but keep the SDK's 600s default for reads: reasoning
+# models with code_interpreter can go minutes without sending a byte, and a
+# timeout there makes the SDK retry (and bill) the whole request again
+_HTTP_TIMEOUT = httpx.Timeout(600.0, connect=10.0)
+
+try:
+    import h2  # noqa: F401
+    # Multiplex concurrent requests over one TLS connection
+    _HTTP2 = True
+except ImportError:  # optional: httpx stays on HTTP/1.1 without it
+    _HTTP2 = False
+
+
+# Polling of queued/in-progress responses: short first wait (most responses
+# finish quickly), then exponential backoff capped at _POLL_MAX_DELAY seconds
+_POLL_INITIAL_DELAY = 0.5
+_POLL_BACKOFF = 1.5
+_POLL_MAX_DELAY = 10.0
+
+# Stream events that carry the finished response
+_FINAL_RESPONSE_EVENTS: FrozenSet[str] = frozenset(
+    {"response.completed", "response.failed", "response.incomplete"}
+)
+
+# Network failures while reading a stream; the SDK raises the openai types when
+# opening it and lets httpx errors through once events are being iterated
+_STREAM_INTERRUPTIONS = (openai.APIConnectionError, httpx.TransportError)
+
+
+# Concurrent multipart uploads (and response file downloads) per call
+_UPLOAD_CONCURRENCY = 8
+
+# Downloads are streamed to disk in chunks of this size instead of buffered whole
+_DOWNLOAD_CHUNK_SIZE = 1 << 20
+
+
+# Workbook formats whose contents are injected into the prompt
+_EXCEL_EXTS: FrozenSet[str] = frozenset({".xlsx", ".xlsm", ".xltx", ".xltm"})
+
+
+def _track_stream_event(event: Any, response: Any) -> Tuple[Any, bool]:
+    """
+    Fold one Responses API stream event into the latest known response.
+
+    Returns:
+        (response, done) where done is True once the final response arrived
+    """
+    event_type = getattr(event, "type", None)
+    if event_type == "error":
+        raise RuntimeError(f"Response stream error: {getattr(event, 'message', event)}")
+    streamed = getattr(event, "response", None)
+    if streamed is not None:
+        response = streamed
+    return response, event_type in _FINAL_RESPONSE_EVENTS
+
+
+def _flatten_output(items: Iterable[Any]) -> Iterable[Any]:
+    """Response output items, with nested arrays (OpenAI may return them) flattened one level"""
+    for item in items:
+        if isinstance(item, list):
+            yield from item
+        else:
+            yield item
+
+
+@lru_cache(maxsize=1)
+def _token_encoding() -> Optional[Any]:
+    """
+    tiktoken's o200k_base encoding, loaded on first use; None when tiktoken is
+    not installed or its BPE file cannot be loaded (then ~4 chars per token
+    is assumed)
+    """
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        return None
+
+
+_TRUNC_SUFFIX = "\n\n[...truncated to fit context window...]\n"
+
+# When tokens are counted exactly, text can be denser than 4 chars per token;
+# Excel extraction then reads up to this many chars per budgeted token before
+# the exact clip, so the cut always falls inside the extracted text in practice
+_EXACT_TOKENS_CHAR_FACTOR = 8
+
+# Output tokens charged to the TPM budget per request on top of its input
+_RESPONSE_HEADROOM_TOKENS = 1000
+
+
+@lru_cache(maxsize=None)
+def _ensure_dir(path: str) -> None:
+    """Create a download directory once per process (batches reuse the same folder)"""
+    os.makedirs(path, exist_ok=True)
+
+
+@lru_cache(maxsize=16)
+def _prompt_cache_key(model: str, instructions: str) -> str:
+    """Stable prompt_cache_key for a model + instructions pair"""
+    return hashlib.sha256(f"{model}\n{instructions}".encode("utf-8")).hexdigest()[:32]
+
+
+def _log_prompt_cache_usage(response: Any) -> None:
+    """Log how many input tokens were served from the prompt cache"""
+    usage = getattr(response, "usage", None)
+    details = getattr(usage, "input_tokens_details", None)
+    if details is None:
+        return
+    logger.info(f"Prompt cache: {details.cached_tokens}/{usage.input_tokens} input tokens cached")
+
+
+def _file_sha256(file_path: str) -> str:
+    """SHA-256 hex digest of a file's contents"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _format_excel_dump(file_path: str,
+                       sheet_names: List[str],
+                       read_sheet: Callable[[str], Tuple[int, int, Iterable[Sequence[Any]]]],
+                       char_budget: Optional[int] = None) -> str:
+    """
+    Render the prompt dump of a workbook: a summary header, then one block per
+    sheet with its non-empty rows as tab-separated text.
+
+    Args:
+        file_path: Workbook path (only the file name is shown)
+        sheet_names: Sheets in workbook order
+        read_sheet: Returns (max_row, max_col, rows of cell values) for a sheet
+        char_budget: Stop after the dump reaches this many characters
+
+    Returns:
+        The dump text, ending with a [truncated] marker if the budget was hit
+    """
+    # One growing buffer instead of repeated str +=; tell() tracks the budget
+    buf = io.StringIO()
+    buf.write("Excel Data Summary:\n\n")
+    buf.write(f"File: {os.path.basename(file_path)}\n")
+    buf.write(f"Total Sheets: {len(sheet_names)}\n\n")
+    truncated = False
+
+    for sheet_name in sheet_names:
+        if truncated:
+            break
+        max_row, max_col, rows = read_sheet(sheet_name)
+
+        buf.write(f"Sheet: {sheet_name}\n")
+        buf.write(f"Total Rows: {max_row}\n")
+        buf.write(f"Total Columns: {max_col}\n\n")
+
+        for row in rows:
+            # Blank rows (all None) are dropped before any cell is stringified
+            if not any(v is not None for v in row):
+                continue
+            # Deliberately not specialized per type: str() and strip() return
+            # clean strings unchanged (no copy), and type checks cost more
+            values = ["" if v is None else str(v).strip() for v in row]
+            # Whitespace-only cells strip to "": such rows are skipped too
+            if any(values):
+                buf.write("\t".join(values))
+                buf.write("\n")
+                if char_budget is not None and buf.tell() >= char_budget:
+                    truncated = True
+                    break
+
+        if truncated:
+            buf.write("\n[truncated]\n")
+        else:
+            buf.write("\n----------------------------------------\n\n")
+
+    return buf.getvalue()
+
+
+# SpreadsheetML namespaces used by the .xlsx fast path
+_SML = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_PKG_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+_DOC_REL = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+
+
+class _XlsxUnsupported(Exception):
+    """Workbook content the .xlsx fast path leaves to openpyxl"""
+
+
+def _xml_text(node: ET.Element) -> str:
+    """String item text as openpyxl reads it: plain <t> plus rich-text runs, no phonetics"""
+    parts = []
+    plain = node.find(f"{_SML}t")
+    if plain is not None and plain.text:
+        parts.append(plain.text)
+    for run in node.iterfind(f"{_SML}r/{_SML}t"):
+        if run.text:
+            parts.append(run.text)
+    return "".join(parts)
+
+
+def _zip_rels(zf: zipfile.ZipFile, part: str) -> Dict[str, Tuple[str, str]]:
+    """Relationships of a package part: Id -> (type, resolved target path)"""
+    base, name = posixpath.split(part)
+    root = ET.fromstring(zf.read(posixpath.join(base, "_rels", f"{name}.rels")))
+    rels = {}
+    for rel in root.iterfind(f"{_PKG_REL}Relationship"):
+        target = rel.get("Target", "")
+        target = target[1:] if target.startswith("/") else posixpath.normpath(posixpath.join(base, target))
+        rels[rel.get("Id")] = (rel.get("Type", ""), target)
+    return rels
+
+
+def _xlsx_date_styles(zf: zipfile.ZipFile, styles_path: Optional[str]) -> FrozenSet[int]:
+    """Indexes of cell styles whose number format shows a date or time"""
+    if not styles_path:
+        return frozenset()
+    from openpyxl.styles.numbers import builtin_format_code, is_date_format, is_timedelta_format
+
+    root = ET.fromstring(zf.read(styles_path))
+    custom = {
+        int(fmt.get("numFmtId")): fmt.get("formatCode")
+        for fmt in root.iterfind(f"{_SML}numFmts/{_SML}numFmt")
+    }
+    date_styles = set()
+    for idx, xf in enumerate(root.iterfind(f"{_SML}cellXfs/{_SML}xf")):
+        fmt_id = int(xf.get("numFmtId", 0))
+        fmt = custom[fmt_id] if fmt_id in custom else builtin_format_code(fmt_id)
+        if fmt and (is_date_format(fmt) or is_timedelta_format(fmt)):
+            date_styles.add(idx)
+    return frozenset(date_styles)
 
-    def _extract_excel_text_for_prompt(self, file_path: str) -> Optional[str]:
+
+def _xlsx_cell_value(cell: ET.Element, shared: List[str], date_styles: FrozenSet[int]) -> Any:
+    """Cell value with openpyxl's read-only (data_only) typing"""
+    data_type = cell.get("t", "n")
+    if data_type == "inlineStr":
+        node = cell.find(f"{_SML}is")
+        return None if node is None else _xml_text(node)
+    value = cell.findtext(f"{_SML}v") or None
+    if value is None:
+        return None
+    if data_type == "n":
+        if int(cell.get("s") or 0) in date_styles:
+            raise _XlsxUnsupported("date-formatted cell")
+        return float(value) if "." in value or "E" in value or "e" in value else int(value)
+    if data_type == "s":
+        return shared[int(value)]
+    if data_type == "b":
+        return bool(int(value))
+    if data_type == "d":
+        raise _XlsxUnsupported("ISO date cell")
+    return value  # "str" (formula result) and "e" (error) stay text
+
+
+def _xlsx_sheet_reader(zf: zipfile.ZipFile):
+    """
+    Prepare the .xlsx fast path for an open package.
+
+    Returns:
+        (sheet names, read_sheet) in the shape _format_excel_dump expects.
+        read_sheet streams <row> elements with iterparse and clears each one,
+        so no per-cell objects are kept.
+    """
+    from openpyxl.utils.cell import column_index_from_string, range_boundaries
+
+    office_doc = [t for typ, t in _zip_rels(zf, "").values() if typ.endswith("/officeDocument")]
+    if not office_doc:
+        raise _XlsxUnsupported("no workbook part")
+    workbook_path = office_doc[0]
+    wb_rels = _zip_rels(zf, workbook_path)
+    by_type = {typ.rsplit("/", 1)[-1]: target for typ, target in wb_rels.values()}
+
+    shared: List[str] = []
+    if "sharedStrings" in by_type:
+        for _, node in ET.iterparse(zf.open(by_type["sharedStrings"])):
+            if node.tag == f"{_SML}si":
+                shared.append(_xml_text(node).replace("x005F_", ""))
+                node.clear()
+    date_styles = _xlsx_date_styles(zf, by_type.get("styles"))
+
+    sheet_paths: Dict[str, str] = {}
+    for sheet in ET.fromstring(zf.read(workbook_path)).iterfind(f"{_SML}sheets/{_SML}sheet"):
+        typ, target = wb_rels[sheet.get(f"{_DOC_REL}id")]
+        if not typ.endswith("/worksheet"):
+            raise _XlsxUnsupported("chart sheet")
+        sheet_paths[sheet.get("name")] = target
+
+    cell_tag, row_tag, dim_tag = f"{_SML}c", f"{_SML}row", f"{_SML}dimension"
+
+    def read_sheet(sheet_name: str):
+        events = ET.iterparse(zf.open(sheet_paths[sheet_name]))
+        bounds = None
+        for _, el in events:
+            if el.tag == dim_tag:
+                bounds = range_boundaries(el.get("ref", ""))
+                break
+            if el.tag in (cell_tag, row_tag):
+                break
+        # openpyxl cannot size such sheets in read-only mode either
+        if not bounds or not all(bounds):
+            raise _XlsxUnsupported("sheet has no dimension")
+        min_col, min_row, max_col, max_row = bounds
+
+        def rows():
+            row_idx = 0
+            for _, el in events:
+                if el.tag != row_tag:
+                    continue
+                r = el.get("r")
+                row_idx = int(r) if r else row_idx + 1
+                if row_idx > max_row:
+                    break
+                if row_idx >= min_row:
+                    values: List[Any] = [None] * (max_col - min_col + 1)
+                    col = 0
+                    for cell in el.iterfind(cell_tag):
+                        ref = cell.get("r")
+                        col = column_index_from_string(ref.rstrip("0123456789")) if ref else col + 1
+                        if min_col <= col <= max_col:
+                            values[col - min_col] = _xlsx_cell_value(cell, shared, date_styles)
+                    yield values
+                el.clear()
+
+        return max_row, max_col, rows()
+
+    return list(sheet_paths), read_sheet
+
+
+class _ResponsesServiceBase:
+    """
+    Prompt building and response parsing shared by OpenAIService and
+    AsyncOpenAIService. No network I/O lives here: each service implements
+    its own (sync or async) calls on top of these helpers.
+    """
+    
+    def _extract_excel_text_for_prompt(self, file_path: str, char_budget: Optional[int] = None) -> Optional[str]:
         """
         NodeJS parity (scenario #2):
         Extract Excel contents into a plain-text, TSV-like dump that can be appended
         to the user message (similar to Wrike-Showcase-GPT's Excel extractor).
+
+        With char_budget, extraction stops once the dump reaches that many
+        characters (the rest would be clipped from the prompt anyway).
         """
+        ext = os.path.splitext(file_path)[1].lower()
+        if ext not in _EXCEL_EXTS:
+            return None
+
+        # Fast path: parse the sheet XML directly, without openpyxl Cell objects.
+        # Rows are streamed and stop at char_budget, so large sheets are never
+        # read whole (unlike pandas.read_excel, whose to_csv would also quote cells)
         try:
-            ext = os.path.splitext(file_path)[1].lower()
-            if ext not in [".xlsx", ".xlsm", ".xltx", ".xltm"]:
-                return None
+            with zipfile.ZipFile(file_path) as zf:
+                sheet_names, read_sheet = _xlsx_sheet_reader(zf)
+                return _format_excel_dump(file_path, sheet_names, read_sheet, char_budget)
+        except Exception as e:
+            logger.debug(f"[EXCEL] XML fast path not used for {file_path} ({e}); falling back to openpyxl")
 
+        try:
             import openpyxl  # local import to avoid hard dependency issues
             from openpyxl.utils.cell import range_boundaries
 
             wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
-            sheet_names = list(wb.sheetnames)
-
-            extracted = "Excel Data Summary:\n\n"
-            extracted += f"File: {os.path.basename(file_path)}\n"
-            extracted += f"Total Sheets: {len(sheet_names)}\n\n"
 
-            for sheet_name in sheet_names:
+            def read_sheet(sheet_name: str):
                 ws = wb[sheet_name]
 
                 # Similar to Node's worksheet['!ref'] used-range.
@@ -83,44 +420,35 @@ class OpenAIService:
                     except Exception:
                         min_col, min_row, max_col, max_row = 1, 1, ws.max_column or 1, ws.max_row or 1
 
-                extracted += f"Sheet: {sheet_name}\n"
-                extracted += f"Total Rows: {max_row}\n"
-                extracted += f"Total Columns: {max_col}\n\n"
-
-                for row in ws.iter_rows(
+                rows = ws.iter_rows(
                     min_row=min_row,
                     max_row=max_row,
                     min_col=min_col,
                     max_col=max_col,
-                ):
-                    values: List[str] = []
-                    any_non_empty = False
-                    for cell in row:
-                        v = cell.value
-                        s = "" if v is None else str(v)
-                        s = s.strip()
-                        if s:
-                            any_non_empty = True
-                        values.append(s)
-                    if any_non_empty:
-                        extracted += "\t".join(values) + "\n"
-
-                extracted += "\n----------------------------------------\n\n"
-
-            return extracted
+                    values_only=True,
+                )
+                return max_row, max_col, rows
+
+            return _format_excel_dump(file_path, list(wb.sheetnames), read_sheet, char_budget)
         except Exception as e:
             logger.warning(f"[EXCEL] Failed to extract Excel text for prompt from {file_path}: {e}")
             return None
-
+    
     def _estimate_tokens_fast(self, text: str) -> int:
         """
-        Very rough token estimate similar to Node's fallback (4 chars per token).
+        Token count of text: exact with tiktoken (o200k_base BPE), otherwise a
+        rough estimate similar to Node's fallback (4 chars per token).
         """
         if not text:
             return 0
+        encoding = _token_encoding()
+        if encoding is not None:
+            return len(encoding.encode_ordinary(text))
         return max(1, len(text) // 4)
-
-    def _get_model_context_window(self, model: str) -> int:
+    
+    @staticmethod
+    @lru_cache(maxsize=32)
+    def _get_model_context_window(model: str) -> int:
         """
         Lightweight context window mapping (Node has a richer table).
         Keep conservative defaults to avoid truncation.
@@ -132,22 +460,100 @@ class OpenAIService:
         if "gpt-4" in m:
             return 128000
         return 32000
-
-    def _clip_text_to_token_budget(self, text: str, max_tokens: int) -> str:
+    
+    def _maybe_clip(self, text: str, max_tokens: int) -> Tuple[str, int]:
         """
         Clip text to approx token budget from the start (same general behavior as Node background limiter).
+        Counting and clipping share one pass over the text.
+
+        Returns:
+            (text, tokens) where tokens is the count of the text before clipping
         """
         if not text:
-            return text
-        if max_tokens <= 0:
-            return ""
-        est = self._estimate_tokens_fast(text)
+            return text, 0
+        encoding = _token_encoding()
+        if encoding is not None:
+            tokens = encoding.encode_ordinary(text)
+            if len(tokens) <= max_tokens:
+                return text, len(tokens)
+            return encoding.decode(tokens[:max(0, max_tokens)]) + _TRUNC_SUFFIX, len(tokens)
+        est = max(1, len(text) // 4)
         if est <= max_tokens:
-            return text
+            return text, est
         # Approx chars to keep
-        keep_chars = max(0, max_tokens * 4)
-        clipped = text[:keep_chars]
-        return clipped + "\n\n[...truncated to fit context window...]\n"
+        return text[:max(0, max_tokens * 4)] + _TRUNC_SUFFIX, est
+    
+    @staticmethod
+    @lru_cache(maxsize=32)
+    def _background_token_budget(model: str) -> int:
+        """
+        Token budget for the user message plus injected Excel content
+        """
+        context_window = _ResponsesServiceBase._get_model_context_window(model)
+        safety_tokens = OPENAI_INPUT_SAFETY_TOKENS
+        if safety_tokens is None:
+            # Exact counts need far less slack than the 4-chars-per-token estimate
+            safety_tokens = 64 if _token_encoding() is not None else 512
+        allowed_input = max(1024, context_window - OPENAI_COMPLETION_BUDGET_TOKENS - safety_tokens)
+
+        # We can't precisely account for tool schemas; keep extra margin like Node.
+        return max(0, allowed_input - OPENAI_TRIM_MARGIN_TOKENS)
+    
+    def _build_user_message(self,
+                            model: str,
+                            user_message: str,
+                            file_paths: Optional[List[str]] = None) -> str:
+        """
+        Build the user message sent to the model: NodeJS parity appends extracted
+        Excel content, then clips the result to fit the model context window.
+        """
+        max_bg_tokens = self._background_token_budget(model)
+        # Length at which the limiter below starts clipping; extraction can
+        # stop there because everything past it is discarded
+        if _token_encoding() is None:
+            char_budget = (max_bg_tokens + 1) * 4
+        else:
+            char_budget = (max_bg_tokens + 1) * _EXACT_TOKENS_CHAR_FACTOR
+
+        # NodeJS parity: append extracted Excel content to the user message
+        enhanced_user_message = user_message or ""
+        if file_paths:
+            for fp in file_paths:
+                header = f"\n\nExcel Content from {os.path.basename(fp)}:\n"
+                remaining = char_budget - len(enhanced_user_message) - len(header)
+                if remaining <= 0:
+                    # Budget spent: later files would be clipped away entirely
+                    enhanced_user_message += header
+                    break
+                excel_text = self._extract_excel_text_for_prompt(fp, char_budget=remaining)
+                if excel_text:
+                    enhanced_user_message += f"{header}{excel_text}\n"
+
+        # NodeJS parity: background limiter (clip injected background to fit context window)
+        try:
+            enhanced_user_message, before_tokens = self._maybe_clip(enhanced_user_message, max_bg_tokens)
+            if before_tokens > max_bg_tokens:
+                logger.info(
+                    f"[LIMITER] Trimmed user message from ~{before_tokens} tokens to ~{max_bg_tokens} tokens to fit context window"
+                )
+        except Exception as _e:
+            pass
+
+        return enhanced_user_message
+    
+    def _resolve_download_path(self, file_info: Dict, output_dir: Optional[str] = None) -> str:
+        """
+        Save downloads into output_dir if provided; otherwise current working directory.
+        Always sanitize the filename to avoid path traversal. The caller creates
+        output_dir (see _ensure_dir).
+        """
+        safe_filename = os.path.basename(file_info.get('filename') or "")
+        if not safe_filename:
+            safe_filename = f"output_{file_info.get('file_id', 'file')}.bin"
+
+        if output_dir:
+            return os.path.join(output_dir, safe_filename)
+        return safe_filename
     
     def build_input_from_message(self, 
                                  message_content: str,
@@ -192,17 +598,17 @@ class OpenAIService:
         
         return input_items
     
-    def create_response(self,
-                       model: str,
-                       instructions: str,
-                       input_items: List[Dict],
-                       tools: Optional[List[Dict]] = None,
-                       conversation_id: Optional[str] = None,
-                       max_output_tokens: Optional[int] = None,
-                       file_ids: Optional[List[str]] = None,
-                       sampling: Optional[Dict] = None) -> Any:
+    def _build_request_data(self,
+                            model: str,
+                            instructions: str,
+                            input_items: List[Dict],
+                            tools: Optional[List[Dict]] = None,
+                            conversation_id: Optional[str] = None,
+                            max_output_tokens: Optional[int] = None,
+                            file_ids: Optional[List[str]] = None,
+                            sampling: Optional[Dict] = None) -> Dict:
         """
-        Create a response using the Responses API
+        Assemble the Responses API request body (shared by sync and async services)
         
         Args:
             model: The model to use
@@ -215,142 +621,102 @@ class OpenAIService:
             sampling: Optional sampling config {temperature, top_p}
             
         Returns:
-            Response object
+            Keyword arguments for client.responses.create
         """
-        try:
-            # NodeJS parity: derive file IDs from input_file blocks if present
-            derived_file_ids: List[str] = []
-            if isinstance(input_items, list):
-                for it in input_items:
-                    if isinstance(it, dict) and it.get("type") == "input_file" and it.get("file_id"):
-                        derived_file_ids.append(it["file_id"])
-
-            # Merge explicit file_ids with derived ones (preserve order; de-dupe)
-            merged_file_ids: List[str] = []
-            for fid in (file_ids or []) + derived_file_ids:
-                if fid and fid not in merged_file_ids:
-                    merged_file_ids.append(fid)
-
-            request_data = {
-                "model": model,
-                "instructions": instructions,
-                "input": input_items
-            }
-            
-            # DEBUG: Log instructions length and preview
-            logger.info(f"[DEBUG] Instructions length: {len(instructions) if instructions else 0} chars")
-            logger.info(f"[DEBUG] Instructions preview: {instructions[:200] if instructions else 'None'}...")
-            
-            # Add sampling (temperature, top_p) if provided - matching MongoDB version
-            if sampling:
-                if 'temperature' in sampling and sampling['temperature'] is not None:
-                    request_data['temperature'] = sampling['temperature']
-                if 'top_p' in sampling and sampling['top_p'] is not None:
-                    request_data['top_p'] = sampling['top_p']
-            
-            # Add conversation if provided (stateful mode)
-            if conversation_id:
-                request_data["conversation"] = conversation_id
-                logger.info(f"Using conversation: {conversation_id}")
-            else:
-                logger.info("Running stateless (no conversation)")
-            
-            # Add tools if provided
-            if tools:
-                logger.info(f"[DEBUG] Raw tools input: {tools}")
-                # Configure tools with proper format for Responses API
-                configured_tools = []
-                for tool in tools:
-                    if tool.get("type") == "code_interpreter":
-                        # Add container configuration for code_interpreter
-                        # Files are passed via container.file_ids (NOT in input)
-                        configured_tool = {
-                            **tool,
-                            "container": {
-                                "type": "auto",
-                                "file_ids": merged_file_ids if merged_file_ids else []
-                            }
-                        }
-                        configured_tools.append(configured_tool)
-                    elif tool.get("type") == "file_search":
-                        # file_search requires vector_store_ids
-                        # If not provided, filter it out to avoid errors
-                        logger.warning("file_search tool requires vector_store_ids but none provided. Skipping file_search.")
-                        continue
-                    elif tool.get("type") in ["web_search", "computer_use", "image_generation"]:
-                        # Other built-in tools
-                        configured_tools.append(tool)
-                    elif tool.get("type") == "function":
-                        # Custom function tools
-                        configured_tools.append(tool)
-                
-                if configured_tools:
-                    request_data["tools"] = configured_tools
-
-                # NodeJS parity: do not send input_file blocks to the API; only message blocks.
-                # Files remain accessible via code_interpreter container.file_ids.
-                if isinstance(request_data.get("input"), list):
-                    msg_items = [
-                        it for it in request_data["input"]
-                        if isinstance(it, dict) and it.get("type") == "message"
-                    ]
-                    if msg_items:
-                        request_data["input"] = msg_items
-            
-                # Add max_output_tokens if specified
-                if max_output_tokens:
-                    request_data["max_output_tokens"] = max_output_tokens
-                
-                # DEBUG: Log final request structure (without full instructions)
-                debug_request = {k: v for k, v in request_data.items() if k != 'instructions'}
-                debug_request['instructions_length'] = len(request_data.get('instructions', ''))
-                logger.info(f"[DEBUG] Final request structure: {debug_request}")
-                
-                # VERIFY: Instructions contain the full Line→Item mapping
-                instructions_text = request_data.get('instructions', '')
-                logger.info(f"✅ Sending {len(instructions_text)} chars of instructions to OpenAI")
-                logger.info(f"✅ Last 400 chars (should show Line→Item mapping): ...{instructions_text[-400:]}")
-                
-                logger.info(f"Creating response with model: {model}")
-                response = self.client.responses.create(**request_data)
-            
-            # Wait for response to be ready
-            response = self._wait_for_response_ready(response)
-            
-            return response
+        # NodeJS parity: derive file IDs from input_file blocks if present
+        derived_file_ids: List[str] = []
+        if isinstance(input_items, list):
+            derived_file_ids = [
+                it.get("file_id") for it in input_items
+                if isinstance(it, dict) and it.get("type") == "input_file"
+            ]
+
+        # Merge explicit file_ids with derived ones (preserve order; de-dupe in O(N))
+        merged_file_ids: List[str] = list(dict.fromkeys(
+            fid for fid in (file_ids or []) + derived_file_ids if fid
+        ))
+
+        request_data = {
+            "model": model,
+            "instructions": instructions,
+            "input": input_items,
+            # Requests sharing these instructions (the static prefix; per-file
+            # content stays in input) are routed to the same prompt cache
+            "prompt_cache_key": _prompt_cache_key(model, instructions or ""),
+        }
+        
+        # DEBUG: Log instructions length and preview (formatted only when enabled)
+        logger.debug("[DEBUG] Instructions length: %d chars", len(instructions) if instructions else 0)
+        logger.debug("[DEBUG] Instructions preview: %.200s...", instructions)
+        
+        # Add sampling (temperature, top_p) if provided - matching MongoDB version
+        if sampling:
+            if 'temperature' in sampling and sampling['temperature'] is not None:
+                request_data['temperature'] = sampling['temperature']
+            if 'top_p' in sampling and sampling['top_p'] is not None:
+                request_data['top_p'] = sampling['top_p']
+        
+        # Add conversation if provided (stateful mode)
+        if conversation_id:
+            request_data["conversation"] = conversation_id
+            logger.info(f"Using conversation: {conversation_id}")
+        else:
+            logger.info("Running stateless (no conversation)")
+        
+        # Add tools if provided
+        if tools:
+            logger.debug("[DEBUG] Raw tools input: %s", tools)
+            # Configure tools with proper format for Responses API
+            configured_tools = []
+            # Files are passed via container.file_ids (NOT in input)
+            container = {"type": "auto", "file_ids": merged_file_ids}
+            for tool in tools:
+                if tool.get("type") == "code_interpreter":
+                    # Add container configuration for code_interpreter
+                    configured_tool = tool.copy()
+                    configured_tool["container"] = container
+                    configured_tools.append(configured_tool)
+                elif tool.get("type") == "file_search":
+                    # file_search requires vector_store_ids
+                    # If not provided, filter it out to avoid errors
+                    logger.warning("file_search tool requires vector_store_ids but none provided. Skipping file_search.")
+                    continue
+                elif tool.get("type") in ["web_search", "computer_use", "image_generation"]:
+                    # Other built-in tools
+                    configured_tools.append(tool)
+                elif tool.get("type") == "function":
+                    # Custom function tools
+                    configured_tools.append(tool)
             
-        except Exception as e:
-            logger.error(f"Error creating response: {e}")
-            raise
+            if configured_tools:
+                request_data["tools"] = configured_tools
+
+        # NodeJS parity: do not send input_file blocks to the API; only message blocks.
+        # Files remain accessible via code_interpreter container.file_ids.
+        # Applies with or without tools, as do max_output_tokens and the logging below.
+        if isinstance(request_data.get("input"), list):
+            msg_items = [
+                it for it in request_data["input"]
+                if isinstance(it, dict) and it.get("type") == "message"
+            ]
+            if msg_items:
+                request_data["input"] = msg_items
     
-    def _wait_for_response_ready(self, response: Any, max_wait: int = 300) -> Any:
-        """
-        Wait for response to be ready (if it's being processed)
+        # Add max_output_tokens if specified
+        if max_output_tokens:
+            request_data["max_output_tokens"] = max_output_tokens
         
-        Args:
-            response: Response object
-            max_wait: Maximum seconds to wait
-            
-        Returns:
-            Ready response object
-        """
-        start_time = time.time()
-        while hasattr(response, 'status') and response.status in ['queued', 'in_progress']:
-            if time.time() - start_time > max_wait:
-                raise TimeoutError(f"Response did not complete within {max_wait} seconds")
-            
-            logger.info(f"Response status: {response.status}, waiting...")
-            time.sleep(2)
-            
-            # Re-fetch response status if needed
-            try:
-                response = self.client.responses.retrieve(response.id)
-            except:
-                # If retrieve not available, continue with existing response
-                pass
+        # DEBUG: Log final request structure (without full instructions or the
+        # user message, which is the same for every file in a batch)
+        if logger.isEnabledFor(logging.DEBUG):
+            debug_request = {k: v for k, v in request_data.items() if k not in ('instructions', 'input')}
+            debug_request['instructions_length'] = len(request_data.get('instructions', ''))
+            debug_request['input_items'] = len(request_data.get('input') or [])
+            logger.debug("[DEBUG] Final request structure: %s", debug_request)
         
-        logger.info(f"Response ready with status: {getattr(response, 'status', 'completed')}")
-        return response
+        logger.info(f"✅ Sending {len(request_data.get('instructions') or '')} chars of instructions to OpenAI")
+
+        return request_data
     
     def extract_files_from_response(self, response: Any) -> List[Dict]:
         """
@@ -378,7 +744,274 @@ class OpenAIService:
                                             'container_id': annotation.container_id
                                         })
         
-        return files
+        return files
+    
+    def extract_text_from_response(self, response: Any) -> str:
+        """
+        Extract text content from response output
+        
+        Args:
+            response: Response object from OpenAI
+            
+        Returns:
+            Extracted text
+        """
+        text_parts = []
+        
+        # Debug: log response structure (arguments are formatted only when enabled)
+        output = getattr(response, 'output', None)
+        logger.debug("Response type: %s, output type: %s", type(response), type(output))
+        
+        if isinstance(output, list):
+            logger.debug("Output length: %d", len(output))
+            for item in _flatten_output(output):
+                item_type = getattr(item, 'type', None)
+                logger.debug("  Item type: %s", item_type)
+                if item_type != 'message':
+                    continue
+                for content in getattr(item, 'content', None) or ():
+                    content_type = getattr(content, 'type', None)
+                    logger.debug("    Content type: %s", content_type)
+                    if content_type in ('text', 'output_text'):
+                        logger.debug("    Found text: %.100s...", content.text)
+                        text_parts.append(content.text)
+        
+        logger.info(f"Extracted {len(text_parts)} text parts")
+        return "\n".join(text_parts)
+    
+    def _build_input(self,
+                     model: str,
+                     user_message: str,
+                     tools: Optional[List[Dict]],
+                     file_paths: Optional[List[str]],
+                     file_ids: List[str],
+                     extra_file_ids: Optional[Dict[str, str]]) -> Tuple[List[Dict], List[str], str]:
+        """
+        Build the input items for one request (Excel contents injected into the message)
+        
+        Returns:
+            (input_items, attached file IDs: uploaded file_ids then extra_file_ids,
+             the message as sent)
+        """
+        prompt_paths = list(file_paths or []) + list((extra_file_ids or {}).keys())
+        enhanced_user_message = self._build_user_message(model, user_message, prompt_paths)
+        attached_ids = list(file_ids) + list((extra_file_ids or {}).values())
+        input_items = self.build_input_from_message(
+            enhanced_user_message,
+            attached_ids if attached_ids else None,
+            tools
+        )
+        return input_items, attached_ids, enhanced_user_message
+    
+    @staticmethod
+    def _estimate_request_tokens(instructions: str, message: str) -> int:
+        """
+        Rough token cost of one request for rate limiting: the instructions and
+        the message as sent (Excel dump included) at ~4 chars per token, plus
+        response headroom
+        """
+        return (len(instructions or "") + len(message or "")) // 4 + _RESPONSE_HEADROOM_TOKENS
+    
+    @staticmethod
+    def _distinct_uploads(paths: List[str], digests: List[str]) -> List[Tuple[str, str]]:
+        """(digest, first path) for each distinct file content, in input order"""
+        first_path_for: Dict[str, str] = {}
+        for path, digest in zip(paths, digests):
+            first_path_for.setdefault(digest, path)
+        return list(first_path_for.items())
+    
+    @staticmethod
+    def _ids_by_path(paths: List[str], digests: List[str],
+                     unique: List[Tuple[str, str]], ids: List[str]) -> Dict[str, str]:
+        """Map every path to the file ID uploaded for its content"""
+        by_digest = {digest: file_id for (digest, _), file_id in zip(unique, ids)}
+        return {path: by_digest[digest] for path, digest in zip(paths, digests)}
+    
+    def _download_jobs(self, response: Any, output_dir: Optional[str] = None) -> List[Tuple[Dict, str]]:
+        """
+        (file_info, local path) for every file a response produced; creates output_dir
+        """
+        files = self.extract_files_from_response(response)
+        if not files:
+            return []
+        
+        logger.info(f"Found {len(files)} file(s) in response")
+        if output_dir:
+            _ensure_dir(output_dir)
+        return [(info, self._resolve_download_path(info, output_dir)) for info in files]
+    
+    @staticmethod
+    def _distinct_targets(jobs: List[Tuple[Dict, str]]) -> bool:
+        """Whether every download has its own target path (so they may run concurrently)"""
+        return len({path for _, path in jobs}) == len(jobs)
+    
+    @staticmethod
+    def _downloaded_files(jobs: List[Tuple[Dict, str]], ok: Iterable[bool]) -> List[Dict]:
+        """{file_id, filename, local_path} for the downloads that succeeded"""
+        return [
+            {
+                'file_id': file_info['file_id'],
+                'filename': file_info['filename'],
+                'local_path': output_path
+            }
+            for (file_info, output_path), success in zip(jobs, ok)
+            if success
+        ]
+    
+    def _response_result(self,
+                         response: Any,
+                         conversation_id: Optional[str],
+                         model: str,
+                         files: List[Dict]) -> Dict:
+        """Result dict returned by get_assistant_response (and its batch/async variants)"""
+        return {
+            "response_id": response.id,
+            "conversation_id": conversation_id,
+            "text": self.extract_text_from_response(response),
+            "status": getattr(response, 'status', 'completed'),
+            "model": model,
+            "files": files,
+            "raw_response": response
+        }
+
+
+class OpenAIService(_ResponsesServiceBase):
+    """Service class for OpenAI Responses API operations"""
+    
+    def __init__(self):
+        """Initialize OpenAI service"""
+        self.http_client = httpx.Client(limits=_http_limits(), timeout=_HTTP_TIMEOUT, http2=_HTTP2)
+        self.client = openai.OpenAI(api_key=OPENAI_API_KEY, http_client=self.http_client)
+        logger.info("OpenAI Responses API service initialized")
+    
+    def warm_up(self) -> None:
+        """
+        Open a pooled TLS connection to the API ahead of the first real request.
+        Best effort: failures are logged and ignored.
+        """
+        try:
+            self.http_client.head(
+                f"{OPENAI_BASE_URL}/models",
+                headers={"Authorization": f"Bearer {OPENAI_API_KEY}"},
+            )
+            logger.info("OpenAI connection pool warmed up")
+        except Exception as e:
+            logger.warning(f"OpenAI warm-up request failed: {e}")
+    
+    def create_conversation(self, metadata: Optional[Dict] = None) -> str:
+        """
+        Create a new conversation for stateful interactions
+        
+        Args:
+            metadata: Optional metadata for the conversation
+            
+        Returns:
+            Conversation ID
+        """
+        try:
+            conversation = self.client.conversations.create(
+                metadata=metadata or {}
+            )
+            logger.info(f"Created conversation: {conversation.id}")
+            return conversation.id
+        except Exception as e:
+            logger.error(f"Error creating conversation: {e}")
+            raise
+    
+    def create_response(self,
+                       model: str,
+                       instructions: str,
+                       input_items: List[Dict],
+                       tools: Optional[List[Dict]] = None,
+                       conversation_id: Optional[str] = None,
+                       max_output_tokens: Optional[int] = None,
+                       file_ids: Optional[List[str]] = None,
+                       sampling: Optional[Dict] = None) -> Any:
+        """
+        Create a response using the Responses API
+        
+        Args:
+            model: The model to use
+            instructions: System instructions
+            input_items: List of input items (messages, files, etc.)
+            tools: Optional list of tools
+            conversation_id: Optional conversation ID for stateful interactions
+            max_output_tokens: Maximum output tokens
+            file_ids: Optional list of file IDs for code_interpreter
+            sampling: Optional sampling config {temperature, top_p}
+            
+        Returns:
+            Response object
+        """
+        try:
+            request_data = self._build_request_data(
+                model=model,
+                instructions=instructions,
+                input_items=input_items,
+                tools=tools,
+                conversation_id=conversation_id,
+                max_output_tokens=max_output_tokens,
+                file_ids=file_ids,
+                sampling=sampling,
+            )
+            logger.info(f"Creating response with model: {model}")
+            # Streamed: the final event carries the finished response, so there
+            # is no polling, and events keep the connection busy during long tool runs
+            response = None
+            try:
+                with self.client.responses.create(**request_data, stream=True) as stream:
+                    for event in stream:
+                        response, done = _track_stream_event(event, response)
+                        if done:
+                            break
+            except _STREAM_INTERRUPTIONS as e:
+                # The response keeps running server-side once it was created
+                if response is None:
+                    raise
+                logger.warning(f"Response stream for {response.id} interrupted ({e!r}), polling instead")
+            if response is None:
+                raise RuntimeError("Response stream ended before the response was created")
+            
+            # Stream ended or dropped before the final event: poll the response by id
+            response = self._wait_for_response_ready(response)
+            _log_prompt_cache_usage(response)
+            
+            return response
+            
+        except Exception as e:
+            logger.error(f"Error creating response: {e}")
+            raise
+    
+    def _wait_for_response_ready(self, response: Any, max_wait: int = 300) -> Any:
+        """
+        Wait for response to be ready (if it's being processed)
+        
+        Args:
+            response: Response object
+            max_wait: Maximum seconds to wait
+            
+        Returns:
+            Ready response object
+        """
+        start_time = time.monotonic()
+        delay = _POLL_INITIAL_DELAY
+        while hasattr(response, 'status') and response.status in ['queued', 'in_progress']:
+            if time.monotonic() - start_time > max_wait:
+                raise TimeoutError(f"Response did not complete within {max_wait} seconds")
+            
+            logger.info(f"Response status: {response.status}, waiting {delay:.1f}s...")
+            time.sleep(delay)
+            delay = min(delay * _POLL_BACKOFF, _POLL_MAX_DELAY)
+            
+            # Re-fetch response status if needed
+            try:
+                response = self.client.responses.retrieve(response.id)
+            except:
+                # If retrieve not available, continue with existing response
+                pass
+        
+        logger.info(f"Response ready with status: {getattr(response, 'status', 'completed')}")
+        return response
     
     def delete_file(self, file_id: str) -> bool:
         """
@@ -405,6 +1038,22 @@ class OpenAIService:
             logger.error(f"Error deleting file {file_id}: {e}")
             return False
     
+    def delete_files(self, file_ids: List[str]) -> List[bool]:
+        """
+        Delete several files from OpenAI Files storage concurrently
+        
+        Args:
+            file_ids: File IDs to delete
+            
+        Returns:
+            One delete_file result per file ID, in input order
+        """
+        file_ids = list(file_ids)
+        if len(file_ids) <= 1:
+            return [self.delete_file(file_id) for file_id in file_ids]
+        with ThreadPoolExecutor(max_workers=min(_UPLOAD_CONCURRENCY, len(file_ids))) as ex:
+            return list(ex.map(self.delete_file, file_ids))
+    
     def download_file(self, file_id: str, output_path: str, container_id: Optional[str] = None) -> bool:
         """
         Download a file from OpenAI (regular file or container file)
@@ -434,17 +1083,18 @@ class OpenAIService:
                         "OpenAI-Beta": "containers=v1"
                     }
                     
-                    with httpx.Client(timeout=60.0) as client:
-                        response = client.get(url, headers=headers)
-                        
+                    # Shared pooled client: no new TCP/TLS handshake per download
+                    with self.http_client.stream("GET", url, headers=headers) as response:
                         if response.status_code == 200:
                             # Write to local file
                             with open(output_path, 'wb') as f:
-                                f.write(response.content)
+                                for chunk in response.iter_bytes(_DOWNLOAD_CHUNK_SIZE):
+                                    f.write(chunk)
                             
                             logger.info(f"Successfully downloaded container file to {output_path}")
                             return True
                         else:
+                            response.read()
                             logger.error(f"Failed to download container file: HTTP {response.status_code}")
                             logger.error(f"Response: {response.text}")
                             logger.info("Note: Container files are temporary and exist only in the code_interpreter sandbox")
@@ -457,11 +1107,11 @@ class OpenAIService:
                     return False
             else:
                 # Regular file download
-                file_content = self.client.files.content(file_id)
-                
-                # Write to local file
-                with open(output_path, 'wb') as f:
-                    f.write(file_content.read())
+                with self.client.files.with_streaming_response.content(file_id) as file_content:
+                    # Write to local file
+                    with open(output_path, 'wb') as f:
+                        for chunk in file_content.iter_bytes(_DOWNLOAD_CHUNK_SIZE):
+                            f.write(chunk)
                 
                 logger.info(f"Successfully downloaded file to {output_path}")
                 return True
@@ -470,58 +1120,6 @@ class OpenAIService:
             logger.error(f"Error downloading file {file_id}: {e}")
             return False
     
-    def extract_text_from_response(self, response: Any) -> str:
-        """
-        Extract text content from response output
-        
-        Args:
-            response: Response object from OpenAI
-            
-        Returns:
-            Extracted text
-        """
-        text_parts = []
-        
-        # Debug: log response structure
-        logger.info(f"Response type: {type(response)}")
-        logger.info(f"Response has output: {hasattr(response, 'output')}")
-        if hasattr(response, 'output'):
-            logger.info(f"Output type: {type(response.output)}")
-            logger.info(f"Output length: {len(response.output) if isinstance(response.output, list) else 'N/A'}")
-            if isinstance(response.output, list) and len(response.output) > 0:
-                logger.info(f"First output item type: {type(response.output[0])}")
-                logger.info(f"First output item: {response.output[0]}")
-        
-        if hasattr(response, 'output') and isinstance(response.output, list):
-            for i, item in enumerate(response.output):
-                logger.info(f"Processing output item {i}: type={type(item)}")
-                
-                # Handle array items (OpenAI may return nested arrays)
-                if isinstance(item, list):
-                    for sub_item in item:
-                        if hasattr(sub_item, 'type'):
-                            logger.info(f"  Sub-item type: {sub_item.type}")
-                            if sub_item.type == 'message':
-                                if hasattr(sub_item, 'content'):
-                                    for content in sub_item.content:
-                                        if hasattr(content, 'type') and content.type in ['text', 'output_text']:
-                                            text_parts.append(content.text)
-                # Handle direct items
-                elif hasattr(item, 'type'):
-                    logger.info(f"  Item type: {item.type}")
-                    if item.type == 'message':
-                        if hasattr(item, 'content'):
-                            logger.info(f"  Message content: {item.content}")
-                            for content in item.content:
-                                if hasattr(content, 'type'):
-                                    logger.info(f"    Content type: {content.type}")
-                                    if content.type in ['text', 'output_text']:
-                                        logger.info(f"    Found text: {content.text[:100]}...")
-                                        text_parts.append(content.text)
-        
-        logger.info(f"Extracted {len(text_parts)} text parts")
-        return "\n".join(text_parts)
-    
     def upload_file(self, file_path: str, purpose: str = "assistants") -> str:
         """
         Upload a file to OpenAI
@@ -552,6 +1150,236 @@ class OpenAIService:
             logger.error(f"Error uploading file: {e}")
             raise
     
+    def submit_batch(self, batch_requests: List[Dict], metadata: Optional[Dict] = None) -> str:
+        """
+        Submit Responses API requests as a single Batch API job
+        
+        Args:
+            batch_requests: List of {"custom_id": str, "body": <responses.create kwargs>}
+            metadata: Optional metadata for the batch
+            
+        Returns:
+            Batch ID
+        """
+        try:
+            fd, jsonl_path = tempfile.mkstemp(suffix=".jsonl", prefix="batch_input_")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    for req in batch_requests:
+                        line = {
+                            "custom_id": req["custom_id"],
+                            "method": "POST",
+                            "url": "/v1/responses",
+                            "body": req["body"],
+                        }
+                        # orjson writes UTF-8 directly (same as ensure_ascii=False)
+                        f.write(orjson.dumps(line) + b"\n")
+                input_file_id = self.upload_file(jsonl_path, purpose="batch")
+            finally:
+                os.remove(jsonl_path)
+
+            batch = self.client.batches.create(
+                input_file_id=input_file_id,
+                endpoint="/v1/responses",
+                completion_window="24h",
+                metadata=metadata or None,
+            )
+            logger.info(f"Created batch {batch.id} with {len(batch_requests)} request(s)")
+            return batch.id
+        except Exception as e:
+            logger.error(f"Error submitting batch: {e}")
+            raise
+    
+    def wait_for_batch(self,
+                       batch_id: str,
+                       max_wait: int = 24 * 3600,
+                       initial_delay: float = 5.0,
+                       max_delay: float = 300.0) -> Any:
+        """
+        Poll a batch with exponential backoff until it reaches a terminal status
+        
+        Args:
+            batch_id: The batch ID
+            max_wait: Maximum seconds to wait
+            initial_delay: First poll interval in seconds
+            max_delay: Upper bound for the poll interval
+            
+        Returns:
+            Final batch object
+        """
+        start_time = time.time()
+        delay = initial_delay
+        while True:
+            batch = self.client.batches.retrieve(batch_id)
+            if batch.status in ("completed", "failed", "expired", "cancelled"):
+                logger.info(f"Batch {batch_id} finished with status: {batch.status}")
+                return batch
+            if time.time() - start_time > max_wait:
+                raise TimeoutError(f"Batch {batch_id} did not complete within {max_wait} seconds")
+
+            counts = getattr(batch, "request_counts", None)
+            if counts is not None:
+                logger.info(
+                    f"Batch {batch_id} status: {batch.status} "
+                    f"({counts.completed}/{counts.total} done, {counts.failed} failed), waiting {delay:.0f}s..."
+                )
+            else:
+                logger.info(f"Batch {batch_id} status: {batch.status}, waiting {delay:.0f}s...")
+            time.sleep(delay)
+            delay = min(delay * 2, max_delay)
+    
+    def read_batch_results(self, batch: Any) -> Dict[str, Dict]:
+        """
+        Download a finished batch's output and error files
+        
+        Args:
+            batch: Batch object returned by wait_for_batch
+            
+        Returns:
+            Mapping of custom_id -> {"response": Response or None, "error": str or None}
+        """
+        from openai.types.responses import Response
+
+        results: Dict[str, Dict] = {}
+        for file_id in (getattr(batch, "output_file_id", None), getattr(batch, "error_file_id", None)):
+            if not file_id:
+                continue
+            content = self.client.files.content(file_id)
+            # Parse the raw bytes line by line (no str decode of the whole file)
+            for line in content.content.splitlines():
+                if not line.strip():
+                    continue
+                record = orjson.loads(line)
+                custom_id = record.get("custom_id")
+                body = (record.get("response") or {}).get("body") or {}
+                status_code = (record.get("response") or {}).get("status_code")
+                if record.get("error") or status_code != 200:
+                    error = record.get("error") or body.get("error") or f"HTTP {status_code}"
+                    results[custom_id] = {"response": None, "error": str(error)}
+                else:
+                    results[custom_id] = {"response": Response.model_validate(body), "error": None}
+        return results
+    
+    def upload_files(self, file_paths: List[str], purpose: str = "assistants") -> Dict[str, str]:
+        """
+        Upload several files, sending each distinct file content only once
+        
+        Args:
+            file_paths: Paths to upload (duplicates and empty entries are ignored)
+            purpose: Purpose of the files (default: "assistants")
+            
+        Returns:
+            Mapping of local path -> file ID (paths with identical SHA-256 share an ID)
+        """
+        paths = list(dict.fromkeys(p for p in file_paths if p))
+        digests = [_file_sha256(p) for p in paths]
+        
+        # Distinct contents go up concurrently (blocking HTTPS round-trips)
+        unique = self._distinct_uploads(paths, digests)
+        if len(unique) > 1:
+            with ThreadPoolExecutor(max_workers=min(_UPLOAD_CONCURRENCY, len(unique))) as ex:
+                ids = list(ex.map(lambda item: self.upload_file(item[1], purpose=purpose), unique))
+        else:
+            ids = [self.upload_file(path, purpose=purpose) for _, path in unique]
+        return self._ids_by_path(paths, digests, unique, ids)
+    
+    def _download_response_files(self, response: Any, output_dir: Optional[str] = None) -> List[Dict]:
+        """
+        Download every file a response produced
+        
+        Args:
+            response: Response object
+            output_dir: Where to save the files (default: current directory)
+            
+        Returns:
+            List of {file_id, filename, local_path} for the files that downloaded
+        """
+        jobs = self._download_jobs(response, output_dir)
+        
+        def _download(job) -> bool:
+            info, output_path = job
+            return self.download_file(info['file_id'], output_path, info.get('container_id'))
+        
+        # Parallel only when every file has its own target path
+        if len(jobs) > 1 and self._distinct_targets(jobs):
+            with ThreadPoolExecutor(max_workers=min(_UPLOAD_CONCURRENCY, len(jobs))) as ex:
+                ok = list(ex.map(_download, jobs))
+        else:
+            ok = [_download(job) for job in jobs]
+        
+        return self._downloaded_files(jobs, ok)
+    
+    def get_assistant_response_batch(self,
+                                     requests: List[Dict],
+                                     metadata: Optional[Dict] = None,
+                                     output_dir: Optional[str] = None,
+                                     max_wait: int = 24 * 3600) -> Dict[str, Dict]:
+        """
+        Batch API counterpart of get_assistant_response: run many independent
+        requests as one batch job (half the cost, separate rate limits, but
+        results arrive within the 24h batch window rather than interactively)
+        
+        Args:
+            requests: List of {"custom_id", "model", "instructions", "user_message"}, each
+                optionally with "tools", "file_paths", "sampling" and "extra_file_ids"
+                (same meaning as the get_assistant_response arguments)
+            metadata: Optional metadata for the batch
+            output_dir: Where to save files returned by the responses
+            max_wait: Maximum seconds to wait for the batch to finish
+            
+        Returns:
+            Mapping of custom_id -> result dict shaped like get_assistant_response's
+            (conversation_id is always None), or {"error": str} for failed requests
+        """
+        # One upload per distinct file across the whole batch
+        all_paths = [p for req in requests for p in (req.get("file_paths") or []) if p]
+        uploaded = self.upload_files(all_paths) if all_paths else {}
+        try:
+            batch_requests = []
+            for req in requests:
+                extra_file_ids = req.get("extra_file_ids") or {}
+                file_paths = [p for p in (req.get("file_paths") or []) if p]
+                file_ids = list(dict.fromkeys(uploaded[p] for p in file_paths))
+                input_items, attached_ids, _ = self._build_input(
+                    req["model"], req["user_message"], req.get("tools"), file_paths, file_ids, extra_file_ids
+                )
+                body = self._build_request_data(
+                    model=req["model"],
+                    instructions=req["instructions"],
+                    input_items=input_items,
+                    tools=req.get("tools"),
+                    file_ids=attached_ids,
+                    sampling=req.get("sampling"),
+                )
+                batch_requests.append({"custom_id": req["custom_id"], "body": body})
+            
+            batch_id = self.submit_batch(batch_requests, metadata=metadata)
+            batch = self.wait_for_batch(batch_id, max_wait=max_wait)
+            outcomes = self.read_batch_results(batch)
+            
+            results: Dict[str, Dict] = {}
+            for req in requests:
+                custom_id = req["custom_id"]
+                outcome = outcomes.get(custom_id)
+                if outcome is None:
+                    results[custom_id] = {"error": f"No batch result (batch status: {batch.status})"}
+                    continue
+                if outcome["error"]:
+                    results[custom_id] = {"error": outcome["error"]}
+                    continue
+                
+                response = outcome["response"]
+                _log_prompt_cache_usage(response)
+                results[custom_id] = self._response_result(
+                    response, None, req["model"], self._download_response_files(response, output_dir)
+                )
+            return results
+        finally:
+            file_ids = list(dict.fromkeys(uploaded.values()))
+            if file_ids:
+                logger.info(f"Cleaning up {len(file_ids)} uploaded file(s)")
+                self.delete_files(file_ids)
+    
     def add_message_to_conversation(self,
                                     conversation_id: str,
                                     model: str,
@@ -614,7 +1442,9 @@ class OpenAIService:
                                   conversation_id: Optional[str] = None,
                                   sampling: Optional[Dict] = None,
                                   metadata: Optional[Dict] = None,
-                                  output_dir: Optional[str] = None) -> Dict:
+                                  output_dir: Optional[str] = None,
+                                  extra_file_ids: Optional[Dict[str, str]] = None,
+                                  acquire_tokens: Optional[Callable[[int], None]] = None) -> Dict:
         """
         Complete workflow: Send message and get response using Responses API
         
@@ -628,17 +1458,18 @@ class OpenAIService:
             conversation_id: Existing conversation ID (if continuing)
             sampling: Optional sampling config {temperature, top_p}
             metadata: Optional metadata for new conversations
+            extra_file_ids: Optional already-uploaded attachments as {local_path: file_id};
+                attached like file_paths but not uploaded or deleted here
+            acquire_tokens: Optional rate-limit hook, called with the request's
+                estimated token cost right before it is sent
             
         Returns:
             Dictionary with response and metadata
         """
         try:
-            # Upload files if provided
-            file_ids = []
-            if file_paths:
-                for file_path in file_paths:
-                    file_id = self.upload_file(file_path)
-                    file_ids.append(file_id)
+            # Upload files if provided (identical contents are uploaded once)
+            uploaded = self.upload_files(file_paths) if file_paths else {}
+            file_ids = list(dict.fromkeys(uploaded.values()))
             
             # Create or use conversation
             conv_id = conversation_id
@@ -646,38 +1477,11 @@ class OpenAIService:
                 conv_id = self.create_conversation(metadata=metadata)
             
             # Build input
-            # NodeJS parity: append extracted Excel content to the user message
-            enhanced_user_message = user_message or ""
-            if file_paths:
-                for fp in file_paths:
-                    excel_text = self._extract_excel_text_for_prompt(fp)
-                    if excel_text:
-                        enhanced_user_message += f"\n\nExcel Content from {os.path.basename(fp)}:\n{excel_text}\n"
-
-            # NodeJS parity: background limiter (clip injected background to fit context window)
-            try:
-                context_window = self._get_model_context_window(model)
-                completion_budget = int(os.getenv("OPENAI_COMPLETION_BUDGET_TOKENS", "1024"))
-                safety_tokens = int(os.getenv("OPENAI_INPUT_SAFETY_TOKENS", "512"))
-                trim_margin = int(os.getenv("OPENAI_TRIM_MARGIN_TOKENS", "512"))
-                allowed_input = max(1024, context_window - completion_budget - safety_tokens)
-
-                # We can't precisely account for tool schemas; keep extra margin like Node.
-                max_bg_tokens = max(0, allowed_input - trim_margin)
-                before_tokens = self._estimate_tokens_fast(enhanced_user_message)
-                if before_tokens > max_bg_tokens:
-                    logger.info(
-                        f"[LIMITER] Trimming user message from ~{before_tokens} tokens to ~{max_bg_tokens} tokens to fit context window"
-                    )
-                    enhanced_user_message = self._clip_text_to_token_budget(enhanced_user_message, max_bg_tokens)
-            except Exception as _e:
-                pass
-
-            input_items = self.build_input_from_message(
-                enhanced_user_message, 
-                file_ids if file_ids else None,
-                tools
+            input_items, attached_ids, sent_message = self._build_input(
+                model, user_message, tools, file_paths, file_ids, extra_file_ids
             )
+            if acquire_tokens is not None:
+                acquire_tokens(self._estimate_request_tokens(instructions, sent_message))
             
             # Create response with sampling
             response = self.create_response(
@@ -686,57 +1490,305 @@ class OpenAIService:
                 input_items=input_items,
                 tools=tools,
                 conversation_id=conv_id,
-                file_ids=file_ids,
+                file_ids=attached_ids,
                 sampling=sampling  # Pass sampling to match MongoDB version
             )
             
-            # Extract text
-            response_text = self.extract_text_from_response(response)
-            
             # Extract and download files
-            files = self.extract_files_from_response(response)
-            downloaded_files = []
-            
-            if files:
-                logger.info(f"Found {len(files)} file(s) in response")
-                for file_info in files:
-                    # Save downloads into output_dir if provided; otherwise current working directory.
-                    # Always sanitize the filename to avoid path traversal.
-                    safe_filename = os.path.basename(file_info.get('filename') or "")
-                    if not safe_filename:
-                        safe_filename = f"output_{file_info.get('file_id', 'file')}.bin"
-
-                    if output_dir:
-                        os.makedirs(output_dir, exist_ok=True)
-                        output_path = os.path.join(output_dir, safe_filename)
-                    else:
-                        output_path = safe_filename
-
-                    container_id = file_info.get('container_id')
-                    if self.download_file(file_info['file_id'], output_path, container_id):
-                        downloaded_files.append({
-                            'file_id': file_info['file_id'],
-                            'filename': file_info['filename'],
-                            'local_path': output_path
-                        })
+            downloaded_files = self._download_response_files(response, output_dir)
             
             # Clean up uploaded input files
             if file_ids:
                 logger.info(f"Cleaning up {len(file_ids)} uploaded file(s)")
-                for file_id in file_ids:
-                    self.delete_file(file_id)
+                self.delete_files(file_ids)
             
-            return {
-                "response_id": response.id,
-                "conversation_id": conv_id,
-                "text": response_text,
-                "status": getattr(response, 'status', 'completed'),
-                "model": model,
-                "files": downloaded_files,
-                "raw_response": response
-            }
+            return self._response_result(response, conv_id, model, downloaded_files)
             
         except Exception as e:
             logger.error(f"Error in get_assistant_response: {e}")
             raise
 
+
+class AsyncOpenAIService(_ResponsesServiceBase):
+    """
+    Asyncio counterpart of OpenAIService backed by openai.AsyncOpenAI.
+    Every network call is a coroutine; prompt building and response parsing
+    come from _ResponsesServiceBase. The Batch API and conversation-message
+    helpers are sync-only. Create one instance per event loop and close it
+    with aclose().
+    """
+    
+    def __init__(self, pool_size: Optional[int] = None):
+        """
+        Initialize async OpenAI service
+        
+        Args:
+            pool_size: HTTP connections to keep (default: HTTPX_POOL, sized from BATCH_WORKERS)
+        """
+        self.http_client = httpx.AsyncClient(
+            limits=_http_limits(max(pool_size or 0, HTTPX_POOL)), timeout=_HTTP_TIMEOUT, http2=_HTTP2
+        )
+        self.client = openai.AsyncOpenAI(api_key=OPENAI_API_KEY, http_client=self.http_client)
+        logger.info("OpenAI Responses API async service initialized")
+    
+    async def aclose(self) -> None:
+        """Close the underlying HTTP connection pool"""
+        await self.client.close()
+        await self.http_client.aclose()
+    
+    async def create_conversation(self, metadata: Optional[Dict] = None) -> str:
+        """Create a new conversation for stateful interactions"""
+        try:
+            conversation = await self.client.conversations.create(
+                metadata=metadata or {}
+            )
+            logger.info(f"Created conversation: {conversation.id}")
+            return conversation.id
+        except Exception as e:
+            logger.error(f"Error creating conversation: {e}")
+            raise
+    
+    async def create_response(self,
+                              model: str,
+                              instructions: str,
+                              input_items: List[Dict],
+                              tools: Optional[List[Dict]] = None,
+                              conversation_id: Optional[str] = None,
+                              max_output_tokens: Optional[int] = None,
+                              file_ids: Optional[List[str]] = None,
+                              sampling: Optional[Dict] = None) -> Any:
+        """Create a response using the Responses API"""
+        try:
+            request_data = self._build_request_data(
+                model=model,
+                instructions=instructions,
+                input_items=input_items,
+                tools=tools,
+                conversation_id=conversation_id,
+                max_output_tokens=max_output_tokens,
+                file_ids=file_ids,
+                sampling=sampling,
+            )
+            logger.info(f"Creating response with model: {model}")
+            # Streamed: the final event carries the finished response, so there
+            # is no polling, and events keep the connection busy during long tool runs
+            response = None
+            try:
+                async with await self.client.responses.create(**request_data, stream=True) as stream:
+                    async for event in stream:
+                        response, done = _track_stream_event(event, response)
+                        if done:
+                            break
+            except _STREAM_INTERRUPTIONS as e:
+                # The response keeps running server-side once it was created
+                if response is None:
+                    raise
+                logger.warning(f"Response stream for {response.id} interrupted ({e!r}), polling instead")
+            if response is None:
+                raise RuntimeError("Response stream ended before the response was created")
+            
+            # Stream ended or dropped before the final event: poll the response by id
+            response = await self._wait_for_response_ready(response)
+            _log_prompt_cache_usage(response)
+            
+            return response
+            
+        except Exception as e:
+            logger.error(f"Error creating response: {e}")
+            raise
+    
+    async def _wait_for_response_ready(self, response: Any, max_wait: int = 300) -> Any:
+        """Wait for response to be ready without blocking the event loop"""
+        start_time = time.monotonic()
+        delay = _POLL_INITIAL_DELAY
+        while hasattr(response, 'status') and response.status in ['queued', 'in_progress']:
+            if time.monotonic() - start_time > max_wait:
+                raise TimeoutError(f"Response did not complete within {max_wait} seconds")
+            
+            logger.info(f"Response status: {response.status}, waiting {delay:.1f}s...")
+            await asyncio.sleep(delay)
+            delay = min(delay * _POLL_BACKOFF, _POLL_MAX_DELAY)
+            
+            try:
+                response = await self.client.responses.retrieve(response.id)
+            except Exception:
+                pass
+        
+        logger.info(f"Response ready with status: {getattr(response, 'status', 'completed')}")
+        return response
+    
+    async def delete_file(self, file_id: str) -> bool:
+        """Delete a file from OpenAI Files storage"""
+        try:
+            if file_id.startswith("cfile_"):
+                logger.info(f"Skipping deletion of container file {file_id} (auto-cleaned by OpenAI)")
+                return True
+            
+            logger.info(f"Deleting file {file_id} from OpenAI storage")
+            await self.client.files.delete(file_id)
+            logger.info(f"Successfully deleted file {file_id}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error deleting file {file_id}: {e}")
+            return False
+    
+    async def delete_files(self, file_ids: List[str]) -> List[bool]:
+        """
+        Async counterpart of OpenAIService.delete_files: at most
+        _UPLOAD_CONCURRENCY deletes are in flight at a time
+        """
+        sem = asyncio.Semaphore(_UPLOAD_CONCURRENCY)
+        
+        async def _delete(file_id: str) -> bool:
+            async with sem:
+                return await self.delete_file(file_id)
+        
+        return list(await asyncio.gather(*(_delete(file_id) for file_id in file_ids)))
+    
+    async def download_file(self, file_id: str, output_path: str, container_id: Optional[str] = None) -> bool:
+        """Download a file from OpenAI (regular file or container file)"""
+        try:
+            logger.info(f"Downloading file {file_id} to {output_path}")
+            
+            if file_id.startswith("cfile_"):
+                if not container_id:
+                    logger.error(f"Container file {file_id} requires container_id")
+                    return False
+                
+                url = f"https://api.openai.com/v1/containers/{container_id}/files/{file_id}/content"
+                headers = {
+                    "Authorization": f"Bearer {OPENAI_API_KEY}",
+                    "OpenAI-Beta": "containers=v1"
+                }
+                # Shared pooled client: no new TCP/TLS handshake per download
+                async with self.http_client.stream("GET", url, headers=headers) as response:
+                    if response.status_code != 200:
+                        await response.aread()
+                        logger.error(f"Failed to download container file: HTTP {response.status_code}")
+                        logger.error(f"Response: {response.text}")
+                        return False
+                    with open(output_path, 'wb') as f:
+                        async for chunk in response.aiter_bytes(_DOWNLOAD_CHUNK_SIZE):
+                            f.write(chunk)
+            else:
+                async with self.client.files.with_streaming_response.content(file_id) as file_content:
+                    with open(output_path, 'wb') as f:
+                        async for chunk in file_content.iter_bytes(_DOWNLOAD_CHUNK_SIZE):
+                            f.write(chunk)
+            
+            logger.info(f"Successfully downloaded file to {output_path}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error downloading file {file_id}: {e}")
+            return False
+    
+    async def upload_file(self, file_path: str, purpose: str = "assistants") -> str:
+        """Upload a file to OpenAI"""
+        try:
+            try:
+                size_bytes = os.path.getsize(file_path)
+                logger.info(f"Uploading local file: {file_path} ({size_bytes} bytes)")
+            except Exception:
+                logger.info(f"Uploading local file: {file_path}")
+
+            # A Path is read by the SDK in a worker thread (anyio); an open file
+            # object would be read synchronously on the event loop
+            response = await self.client.files.create(
+                file=Path(file_path),
+                purpose=purpose
+            )
+            logger.info(f"Uploaded file: {response.id}")
+            return response.id
+        except Exception as e:
+            logger.error(f"Error uploading file: {e}")
+            raise
+    
+    async def upload_files(self, file_paths: List[str], purpose: str = "assistants") -> Dict[str, str]:
+        """
+        Async counterpart of OpenAIService.upload_files: distinct contents are
+        uploaded concurrently, at most _UPLOAD_CONCURRENCY at a time
+        """
+        paths = list(dict.fromkeys(p for p in file_paths if p))
+        digests = list(await asyncio.gather(*(asyncio.to_thread(_file_sha256, p) for p in paths)))
+        
+        sem = asyncio.Semaphore(_UPLOAD_CONCURRENCY)
+        
+        async def _upload(path: str) -> str:
+            async with sem:
+                return await self.upload_file(path, purpose=purpose)
+        
+        unique = self._distinct_uploads(paths, digests)
+        ids = await asyncio.gather(*(_upload(path) for _, path in unique))
+        return self._ids_by_path(paths, digests, unique, ids)
+    
+    async def _download_response_files(self, response: Any, output_dir: Optional[str] = None) -> List[Dict]:
+        """Async counterpart of OpenAIService._download_response_files"""
+        jobs = self._download_jobs(response, output_dir)
+        
+        async def _download(job) -> bool:
+            info, output_path = job
+            return await self.download_file(info['file_id'], output_path, info.get('container_id'))
+        
+        # Concurrent only when every file has its own target path
+        if self._distinct_targets(jobs):
+            ok = await asyncio.gather(*(_download(job) for job in jobs))
+        else:
+            ok = [await _download(job) for job in jobs]
+        
+        return self._downloaded_files(jobs, ok)
+    
+    async def get_assistant_response(self,
+                                     model: str,
+                                     instructions: str,
+                                     user_message: str,
+                                     tools: Optional[List[Dict]] = None,
+                                     file_paths: Optional[List[str]] = None,
+                                     use_conversation: bool = False,
+                                     conversation_id: Optional[str] = None,
+                                     sampling: Optional[Dict] = None,
+                                     metadata: Optional[Dict] = None,
+                                     output_dir: Optional[str] = None,
+                                     extra_file_ids: Optional[Dict[str, str]] = None,
+                                     acquire_tokens: Optional[Callable[[int], Awaitable[None]]] = None) -> Dict:
+        """
+        Async counterpart of OpenAIService.get_assistant_response (acquire_tokens
+        is awaited). Excel extraction runs in a worker thread so it does not
+        stall other requests.
+        """
+        try:
+            uploaded = await self.upload_files(file_paths) if file_paths else {}
+            file_ids = list(dict.fromkeys(uploaded.values()))
+            
+            conv_id = conversation_id
+            if use_conversation and not conv_id:
+                conv_id = await self.create_conversation(metadata=metadata)
+            
+            input_items, attached_ids, sent_message = await asyncio.to_thread(
+                self._build_input, model, user_message, tools, file_paths, file_ids, extra_file_ids
+            )
+            if acquire_tokens is not None:
+                await acquire_tokens(self._estimate_request_tokens(instructions, sent_message))
+            
+            response = await self.create_response(
+                model=model,
+                instructions=instructions,
+                input_items=input_items,
+                tools=tools,
+                conversation_id=conv_id,
+                file_ids=attached_ids,
+                sampling=sampling
+            )
+            
+            downloaded_files = await self._download_response_files(response, output_dir)
+            
+            if file_ids:
+                logger.info(f"Cleaning up {len(file_ids)} uploaded file(s)")
+                await self.delete_files(file_ids)
+            
+            return self._response_result(response, conv_id, model, downloaded_files)
+            
+        except Exception as e:
+            logger.error(f"Error in get_assistant_response: {e}")
+            raise
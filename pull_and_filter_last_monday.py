@@ -13,68 +13,85 @@ Usage:
 from __future__ import annotations
 
 import argparse
+import re
 import sys
-from datetime import date, timedelta
+from datetime import timedelta
+from functools import lru_cache
+from importlib.util import find_spec
 from pathlib import Path
 from typing import Optional, List
 
+import numpy as np
+import orjson
 import pandas as pd
-import requests
-import urllib3
 
 SCRIPT_DIR = Path(__file__).resolve().parent
 if str(SCRIPT_DIR) not in sys.path:
     sys.path.insert(0, str(SCRIPT_DIR))
 
 from chat_notifier import send_chat_message
-
-# Disable SSL warnings (self-signed cert on the WS server)
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+from date_utils import last_monday
+from ws_http import get_session
 
 DEFAULT_URL = "https://192.168.80.74/api/ws/keywords"
 
+# xlsxwriter writes large sheets about 2x faster than openpyxl (pandas' default)
+_XLSX_ENGINE: Optional[str] = "xlsxwriter" if find_spec("xlsxwriter") else None
+
+_ISO_DATE_RE = re.compile(r"^\s*\d{4}-\d{2}-\d{2}")
 
+
+@lru_cache(maxsize=1024)
 def _normalize_col(col: str) -> str:
+    # Same headers and candidate names are normalized on every lookup
     return "".join(str(col).strip().lower().split())
 
 
 def _resolve_column(df: pd.DataFrame, preferred: str, candidates: List[str]) -> Optional[str]:
-    normalized = {_normalize_col(c): c for c in df.columns.tolist()}
-    for cand in [preferred] + candidates:
-        key = _normalize_col(cand)
-        if key in normalized:
-            return normalized[key]
-    return None
+    # One pass over the headers; candidates are tried in priority order
+    normalized = {_normalize_col(c): c for c in df.columns}
+    return next(
+        (normalized[key] for key in map(_normalize_col, [preferred, *candidates]) if key in normalized),
+        None,
+    )
 
 
-def last_monday(today: Optional[date] = None) -> date:
+def _parse_dates(values: pd.Series) -> pd.Series:
     """
-    Return the date of last week's Monday (excluding today even if today is Monday).
+    Parse the API date column on pandas' C parser: ISO dates (the WS API format)
+    get an explicit format, others use pandas' format inference; repeated date
+    strings are parsed once (cache=True).
     """
-    today = today or date.today()
-    days_since_monday = today.weekday()
-    # If today is Monday (weekday = 0), go back 7 days to get last week's Monday
-    if days_since_monday == 0:
-        return today - timedelta(days=7)
-    else:
-        return today - timedelta(days=days_since_monday)
+    sample = values.dropna()
+    fmt = "ISO8601" if not sample.empty and _ISO_DATE_RE.match(str(sample.iloc[0])) else None
+    try:
+        return pd.to_datetime(values, errors="coerce", format=fmt, cache=True)
+    except ValueError:
+        # pandas < 2.0 has no "ISO8601" format
+        return pd.to_datetime(values, errors="coerce", cache=True)
 
 
 def pull_keywords(url: str, timeout_seconds: int = 120) -> pd.DataFrame:
     print("Fetching data from API...")
     print(f"URL: {url}")
-    response = requests.get(url, verify=False, timeout=timeout_seconds)
+    # Shared keep-alive session; verify=False per call because the CA bundle
+    # env vars (REQUESTS_CA_BUNDLE/CURL_CA_BUNDLE) override session.verify
+    response = get_session().get(url, verify=False, timeout=timeout_seconds)
     response.raise_for_status()
 
-    data = response.json()
+    # orjson parses the raw bytes directly (no str decode step as in response.json())
+    data = orjson.loads(response.content)
     if isinstance(data, list):
-        return pd.DataFrame(data)
+        return pd.DataFrame.from_records(data)
     if isinstance(data, dict):
-        for key in ("data", "results", "keywords"):
-            if key in data and isinstance(data[key], list):
-                return pd.DataFrame(data[key])
+        rows = next(
+            (value for value in map(data.get, ("data", "results", "keywords")) if isinstance(value, list)),
+            None,
+        )
+        if rows is not None:
+            return pd.DataFrame.from_records(rows)
         # Fallback: store top-level dict as a single row
-        return pd.DataFrame([data])
+        return pd.DataFrame.from_records([data])
     return pd.DataFrame([{"data": str(data)}])
 
 
@@ -97,13 +114,19 @@ def pull_and_filter_last_monday(
     if not keyword_col:
         raise SystemExit(f"[ERROR] Keyword column not found. Expected: {keyword_column}")
 
-    parsed_dates = pd.to_datetime(df[date_col], errors="coerce").dt.date
+    # Compare as datetime64[D] arrays (vectorized) instead of boxing each value
+    # into a datetime.date; NaT compares False, so unparseable dates drop out
+    parsed = _parse_dates(df[date_col])
+    if parsed.dt.tz is not None:
+        parsed = parsed.dt.tz_localize(None)
+    parsed_days = parsed.to_numpy(dtype="datetime64[D]")
     if weeks not in (1, 2):
         raise SystemExit("[ERROR] weeks must be 1 or 2.")
 
-    end_date = last_monday()
+    # Last week's Monday, even when run on a Monday
+    end_date = last_monday(exclude_today=True)
     start_date = end_date - timedelta(days=(weeks * 7 - 1))
-    mask = (parsed_dates >= start_date) & (parsed_dates <= end_date)
+    mask = (parsed_days >= np.datetime64(start_date, "D")) & (parsed_days <= np.datetime64(end_date, "D"))
     filtered = df.loc[mask].copy()
 
     if filtered.empty:
@@ -133,7 +156,7 @@ def pull_and_filter_last_monday(
             out_file = default_dir / f"keywords_last_2_weeks_{end_date}.xlsx"
 
     out_file.parent.mkdir(parents=True, exist_ok=True)
-    filtered.to_excel(out_file, index=False, sheet_name="Keywords")
+    filtered.to_excel(out_file, index=False, sheet_name="Keywords", engine=_XLSX_ENGINE)
 
     print("=" * 80)
     label = "LAST 1 WEEK" if weeks == 1 else "LAST 2 WEEKS"
@@ -11,10 +11,14 @@ Usage:
 from __future__ import annotations
 
 import argparse
+import gzip
 import json
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from datetime import date, datetime, timedelta
+from datetime import datetime
+from functools import lru_cache
+from importlib.util import find_spec
 from pathlib import Path
 from typing import Dict, Iterable, List, Optional, Tuple
 
@@ -23,36 +27,35 @@ if str(SCRIPT_DIR) not in sys.path:
     sys.path.insert(0, str(SCRIPT_DIR))
 
 from chat_notifier import send_chat_message
+from date_utils import last_monday
+from ws_http import build_session
 
+import orjson
 import pandas as pd
 import requests
-import urllib3
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
-
-# Disable SSL warnings (self-signed cert on the WS server)
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 DEFAULT_BASE_URL = "https://192.168.80.74"
 DEFAULT_ENDPOINT = "/api/ws/items"
 DEFAULT_RUNUPDATE_ENDPOINT = "/api/ws/runupdate"
 TARGET_COLUMNS: Tuple[str, str, str] = ("keyword", "U_line", "Item")
+# With gzip enabled, bodies smaller than this are still sent uncompressed
+GZIP_MIN_BYTES = 4096
+# Rust-based calamine parser when installed (python-calamine), else openpyxl
+_EXCEL_ENGINE: Optional[str] = "calamine" if find_spec("python_calamine") else None
 
-
-def last_monday(today: Optional[date] = None) -> date:
-    today = today or date.today()
-    return today - timedelta(days=today.weekday())
+# Arrow strings are trimmed by a C++ kernel instead of one str.strip() per cell
+_STRING_DTYPE: Optional[str] = "string[pyarrow]" if find_spec("pyarrow") else None
 
 
+@lru_cache(maxsize=1024)
 def _normalize_col(col: str) -> str:
+    # Same headers and candidate names are normalized on every lookup
     return "".join(str(col).strip().lower().split())
 
 
-def _build_column_map(columns: Iterable[str]) -> Dict[str, str]:
-    existing = list(columns)
-    normalized = {_normalize_col(c): c for c in existing}
-
-    keyword_candidates = [
+_KEYWORD_NORMS: Tuple[str, ...] = tuple(
+    _normalize_col(c)
+    for c in (
         "keyword",
         "key word",
         "key_word",
@@ -60,68 +63,53 @@ def _build_column_map(columns: Iterable[str]) -> Dict[str, str]:
         "keyw",
         "keywrd",
         "keyword(s)",
-    ]
-    line_candidates = ["u_line", "uline", "line", "u line", "u-line"]
-    item_candidates = ["item", "items"]
+    )
+)
+_LINE_NORMS: Tuple[str, ...] = tuple(_normalize_col(c) for c in ("u_line", "uline", "line", "u line", "u-line"))
+_ITEM_NORMS: Tuple[str, ...] = tuple(_normalize_col(c) for c in ("item", "items"))
 
-    def pick(cands: List[str]) -> str | None:
-        for cand in cands:
-            key = _normalize_col(cand)
+
+def _build_column_map(columns: Iterable[str]) -> Dict[str, str]:
+    normalized = {_normalize_col(c): c for c in columns}
+
+    def pick(norms: Tuple[str, ...]) -> str | None:
+        for key in norms:
             if key in normalized:
                 return normalized[key]
         return None
 
-    keyword_col = pick(keyword_candidates)
-    line_col = pick(line_candidates)
-    item_col = pick(item_candidates)
-
     mapping: Dict[str, str] = {}
-    if keyword_col:
-        mapping[keyword_col] = "keyword"
-    if line_col:
-        mapping[line_col] = "U_line"
-    if item_col:
-        mapping[item_col] = "Item"
+    for target, norms in zip(TARGET_COLUMNS, (_KEYWORD_NORMS, _LINE_NORMS, _ITEM_NORMS)):
+        source = pick(norms)
+        if source:
+            mapping[source] = target
     return mapping
 
 
+def _read_sheet(path: Path, sheet: str | int) -> pd.DataFrame:
+    if _EXCEL_ENGINE:
+        try:
+            return pd.read_excel(path, sheet_name=sheet, dtype=str, engine=_EXCEL_ENGINE)
+        except Exception as e:
+            print(f"[WARN] {_EXCEL_ENGINE} could not read {path.name} ({e}); retrying with openpyxl")
+    return pd.read_excel(path, sheet_name=sheet, dtype=str)
+
+
 def _clean_str_series(s: pd.Series) -> pd.Series:
+    # Vectorized strip first, so padded " None " / " nan " are blanked as well
     return (
         s.fillna("")
-        .astype(str)
+        .astype(_STRING_DTYPE or str)
+        .str.strip()
         .replace({"nan": "", "None": ""})
-        .map(lambda x: x.strip() if isinstance(x, str) else x)
     )
 
 
-def _chunk_list(items: List[dict], chunk_size: int) -> Iterable[List[dict]]:
-    for i in range(0, len(items), chunk_size):
-        yield items[i : i + chunk_size]
-
-
-def _build_retry_session(
-    total_retries: int,
-    backoff_factor: float,
-    status_forcelist: Tuple[int, ...] = (429, 500, 502, 503, 504),
-) -> requests.Session:
-    session = requests.Session()
-
-    retry = Retry(
-        total=total_retries,
-        connect=total_retries,
-        read=total_retries,
-        status=total_retries,
-        backoff_factor=backoff_factor,
-        status_forcelist=status_forcelist,
-        allowed_methods=frozenset(["PUT"]),
-        raise_on_status=False,
-        respect_retry_after_header=True,
-    )
-
-    adapter = HTTPAdapter(max_retries=retry)
-    session.mount("https://", adapter)
-    session.mount("http://", adapter)
-    return session
+def _records(frame: pd.DataFrame) -> List[dict]:
+    # Zipping the column lists into literal dicts is several times faster
+    # than frame.to_dict(orient="records")
+    keyword, u_line, item = (frame[c].tolist() for c in TARGET_COLUMNS)
+    return [{"keyword": k, "U_line": u, "Item": i} for k, u, i in zip(keyword, u_line, item)]
 
 
 @dataclass
@@ -148,6 +136,9 @@ def push_items_from_excel(
     require_all_fields: bool = False,
     include_all_rows: bool = False,
     continue_on_error: bool = False,
+    concurrency: int = 8,
+    dedup: bool = False,
+    gzip_body: bool = False,
 ) -> UploadResult:
     path = Path(excel_path).expanduser().resolve()
     if not path.exists():
@@ -161,6 +152,8 @@ def push_items_from_excel(
     print(f"Input Excel: {path}")
     print(f"URL: {url}")
     print(f"Batch size: {batch_size}")
+    print(f"Concurrency: {concurrency}")
+    print(f"Gzip bodies: {gzip_body}")
     print(f"Retries: {retries} (backoff_factor={backoff_factor})")
     print(f"Timeout: {timeout_seconds}s")
     print(f"Dry run: {dry_run}")
@@ -168,7 +161,7 @@ def push_items_from_excel(
 
     sheet_to_read = 0 if sheet is None else sheet
     try:
-        df = pd.read_excel(path, sheet_name=sheet_to_read, dtype=str)
+        df = _read_sheet(path, sheet_to_read)
     except Exception as e:
         raise SystemExit(f"[ERROR] Failed to read Excel: {e}")
 
@@ -192,105 +185,150 @@ def push_items_from_excel(
     out["U_line"] = _clean_str_series(renamed["U_line"])
     out["Item"] = _clean_str_series(renamed["Item"])
 
-    all_empty = out["keyword"].eq("") & out["U_line"].eq("") & out["Item"].eq("")
+    # One blank mask for all three columns, reused by the filters and the counts
+    blank = out.eq("")
     if include_all_rows:
-        send_mask = pd.Series([True] * len(out))
+        to_send = out
     elif require_all_fields:
-        send_mask = out["keyword"].ne("") & out["U_line"].ne("") & out["Item"].ne("")
+        to_send = out[~blank.any(axis=1)]
     else:
-        send_mask = ~all_empty
-
-    to_send = out[send_mask].copy()
+        to_send = out[~blank.all(axis=1)]
+    duplicates = 0
+    if dedup:
+        # Identical keyword/U_line/Item triples are sent once (first occurrence kept)
+        deduped = to_send.drop_duplicates(subset=list(TARGET_COLUMNS), keep="first")
+        duplicates = len(to_send) - len(deduped)
+        to_send = deduped
     dropped = total_rows - len(to_send)
 
-    rows: List[dict] = to_send.to_dict(orient="records")
+    # Payload dicts are built per batch (see put_batch), not for all rows up front
+    n_rows = len(to_send)
     print(f"Excel rows: {total_rows}")
-    print(f"Rows to send: {len(rows)}")
+    print(f"Rows to send: {n_rows}")
     print(f"Skipped rows: {dropped}")
+    if dedup:
+        print(f"Duplicate rows removed (included in skipped): {duplicates}")
+    blank_counts = blank.sum()
     print(
         "Blank-field counts (after cleaning): "
-        f"keyword={int(out['keyword'].eq('').sum())}, "
-        f"U_line={int(out['U_line'].eq('').sum())}, "
-        f"Item={int(out['Item'].eq('').sum())}"
+        f"keyword={int(blank_counts['keyword'])}, "
+        f"U_line={int(blank_counts['U_line'])}, "
+        f"Item={int(blank_counts['Item'])}"
     )
 
-    if not rows:
+    if not n_rows:
         raise SystemExit("[ERROR] No valid rows to upload after cleaning.")
 
     if dry_run:
-        preview = {"rows": rows[: min(3, len(rows))]}
+        preview = {"rows": _records(to_send.iloc[:3])}
         print("-" * 80)
         print("[DRY RUN] Example payload preview (first up to 3 rows):")
         print(json.dumps(preview, indent=2))
         print("-" * 80)
         return UploadResult(
             total_rows_in_excel=total_rows,
-            valid_rows=len(rows),
+            valid_rows=n_rows,
             dropped_rows=dropped,
             batches_sent=0,
             received_total=0,
             inserted_total=0,
         )
 
-    session = _build_retry_session(total_retries=retries, backoff_factor=backoff_factor)
+    session = build_session(
+        total_retries=retries,
+        backoff_factor=backoff_factor,
+        allowed_methods=("PUT",),
+        pool_maxsize=max(16, concurrency),
+    )
     headers = {"Content-Type": "application/json"}
+    gzip_headers = {**headers, "Content-Encoding": "gzip"}
+    # Cleared on the first 415, after which every batch goes out uncompressed
+    gzip_enabled = [gzip_body]
+
+    def put_batch(batch: pd.DataFrame) -> requests.Response:
+        # orjson serializes in C; send the bytes as-is (headers carry the JSON content type)
+        body = orjson.dumps({"rows": _records(batch)})
+        if gzip_enabled[0] and len(body) > GZIP_MIN_BYTES:
+            resp = session.put(
+                url,
+                data=gzip.compress(body, compresslevel=1),
+                headers=gzip_headers,
+                verify=False,
+                timeout=timeout_seconds,
+            )
+            if resp.status_code != 415:
+                return resp
+            if gzip_enabled[0]:
+                gzip_enabled[0] = False
+                print("[WARN] Server rejected gzip request bodies (HTTP 415); sending uncompressed")
+        return session.put(url, data=body, headers=headers, verify=False, timeout=timeout_seconds)
 
     received_total = 0
     inserted_total = 0
     batches_sent = 0
 
     print("-" * 80)
-    for idx, batch in enumerate(_chunk_list(rows, batch_size), start=1):
-        payload = {"rows": batch}
-        try:
-            resp = session.put(url, json=payload, headers=headers, verify=False, timeout=timeout_seconds)
-        except requests.exceptions.RequestException as e:
-            msg = f"[ERROR] Batch {idx}: request failed after retries: {e}"
-            if continue_on_error:
-                print(msg)
-                continue
-            raise SystemExit(msg)
-
-        if resp.status_code >= 400:
-            body_preview = (resp.text or "")[:1000]
-            msg = (
-                f"[ERROR] Batch {idx}: HTTP {resp.status_code}\n"
-                f"Response preview:\n{body_preview}"
-            )
-            if continue_on_error:
-                print(msg)
-                continue
-            raise SystemExit(msg)
-
-        batches_sent += 1
-
-        received = 0
-        inserted = 0
+    # Row-range views of the frame; each worker builds its own batch payload
+    batches = [to_send.iloc[start : start + batch_size] for start in range(0, n_rows, batch_size)]
+    # Batches are independent: up to `concurrency` PUTs are in flight at once,
+    # and results are reported in batch order as they complete
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        futures = [executor.submit(put_batch, batch) for batch in batches]
         try:
-            data = resp.json()
-            received = int(data.get("received", 0) or 0)
-            inserted = int(data.get("inserted", 0) or 0)
-        except Exception:
-            data = None
-
-        received_total += received
-        inserted_total += inserted
-
-        now = datetime.now().strftime("%H:%M:%S")
-        if data is not None:
-            print(
-                f"[{now}] Batch {idx}: sent={len(batch)} status={resp.status_code} "
-                f"received={received} inserted={inserted}"
-            )
-        else:
-            print(
-                f"[{now}] Batch {idx}: sent={len(batch)} status={resp.status_code} (non-JSON response)"
-            )
+            for idx, (batch, future) in enumerate(zip(batches, futures), start=1):
+                try:
+                    resp = future.result()
+                except requests.exceptions.RequestException as e:
+                    msg = f"[ERROR] Batch {idx}: request failed after retries: {e}"
+                    if continue_on_error:
+                        print(msg)
+                        continue
+                    raise SystemExit(msg)
+
+                if resp.status_code >= 400:
+                    body_preview = (resp.text or "")[:1000]
+                    msg = (
+                        f"[ERROR] Batch {idx}: HTTP {resp.status_code}\n"
+                        f"Response preview:\n{body_preview}"
+                    )
+                    if continue_on_error:
+                        print(msg)
+                        continue
+                    raise SystemExit(msg)
+
+                batches_sent += 1
+
+                received = 0
+                inserted = 0
+                try:
+                    data = resp.json()
+                    received = int(data.get("received", 0) or 0)
+                    inserted = int(data.get("inserted", 0) or 0)
+                except Exception:
+                    data = None
+
+                received_total += received
+                inserted_total += inserted
+
+                now = datetime.now().strftime("%H:%M:%S")
+                if data is not None:
+                    print(
+                        f"[{now}] Batch {idx}: sent={len(batch)} status={resp.status_code} "
+                        f"received={received} inserted={inserted}"
+                    )
+                else:
+                    print(
+                        f"[{now}] Batch {idx}: sent={len(batch)} status={resp.status_code} (non-JSON response)"
+                    )
+        finally:
+            # On a fatal error, batches not yet started are not sent
+            for future in futures:
+                future.cancel()
 
     print("-" * 80)
     print("[SUCCESS] Upload complete.")
     print(f"Batches sent: {batches_sent}")
-    print(f"Total sent rows: {len(rows)}")
+    print(f"Total sent rows: {n_rows}")
     print(f"API received total: {received_total}")
     print(f"API inserted total: {inserted_total}")
     print("-" * 80)
@@ -313,7 +351,7 @@ def push_items_from_excel(
 
     return UploadResult(
         total_rows_in_excel=total_rows,
-        valid_rows=len(rows),
+        valid_rows=n_rows,
         dropped_rows=dropped,
         batches_sent=batches_sent,
         received_total=received_total,
@@ -333,6 +371,9 @@ def push_with_existing_script(
     require_all_fields: bool,
     include_all_rows: bool,
     continue_on_error: bool,
+    concurrency: int = 8,
+    dedup: bool = False,
+    gzip_body: bool = False,
 ) -> None:
     push_items_from_excel(
         excel_path=input_file,
@@ -348,6 +389,9 @@ def push_with_existing_script(
         require_all_fields=require_all_fields,
         include_all_rows=include_all_rows,
         continue_on_error=continue_on_error,
+        concurrency=concurrency,
+        dedup=dedup,
+        gzip_body=gzip_body,
     )
 
 
@@ -364,6 +408,12 @@ def main() -> None:
         help="Endpoint path to trigger processing after upload",
     )
     parser.add_argument("--batch-size", type=int, default=300, help="Rows per request")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=8,
+        help="Batches uploaded in parallel (1 = one at a time)",
+    )
     parser.add_argument("--timeout", type=int, default=120, help="Request timeout seconds")
     parser.add_argument("--retries", type=int, default=5, help="Retry count")
     parser.add_argument("--backoff", type=float, default=0.75, help="Retry backoff factor")
@@ -378,6 +428,16 @@ def main() -> None:
         action="store_true",
         help="Send even fully-empty rows (default: skip fully-empty rows)",
     )
+    parser.add_argument(
+        "--dedup",
+        action="store_true",
+        help="Send each keyword/U_line/Item combination only once",
+    )
+    parser.add_argument(
+        "--gzip",
+        action="store_true",
+        help="Gzip request bodies over 4 KB (falls back to plain JSON on HTTP 415)",
+    )
     parser.add_argument(
         "--continue-on-error",
         action="store_true",
@@ -404,6 +464,9 @@ def main() -> None:
             require_all_fields=args.require_all_fields,
             include_all_rows=args.include_all_rows,
             continue_on_error=args.continue_on_error,
+            concurrency=args.concurrency,
+            dedup=args.dedup,
+            gzip_body=args.gzip,
         )
         send_chat_message(
             "\n".join(
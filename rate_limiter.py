@@ -0,0 +1,90 @@
+"""
+Proactive request/token rate limiter for OpenAI calls.
+Token-bucket pacing in the style of the OpenAI cookbook's
+api_request_parallel_processor.py: capacity refills continuously, and callers
+wait for capacity instead of hitting 429s and backing off.
+"""
+import asyncio
+import threading
+import time
+
+
+class RateLimiter:
+    """Token bucket for requests-per-minute and tokens-per-minute budgets"""
+
+    def __init__(self, rpm: int = 0, tpm: int = 0):
+        """
+        Args:
+            rpm: Requests per minute (0 disables request pacing)
+            tpm: Tokens per minute (0 disables token pacing)
+        """
+        self.max_requests_per_minute = float(max(0, rpm))
+        self.max_tokens_per_minute = float(max(0, tpm))
+        self.available_request_capacity = self.max_requests_per_minute
+        self.available_token_capacity = self.max_tokens_per_minute
+        self._last_update = time.monotonic()
+        # Shared by worker threads and the asyncio loop; never held across an await.
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_requests_per_minute > 0 or self.max_tokens_per_minute > 0
+
+    def _try_consume(self, tokens: int) -> float:
+        """
+        Refill the buckets and consume one request plus `tokens` if available.
+
+        Returns:
+            0.0 if capacity was consumed, otherwise seconds to wait before retrying
+        """
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self._last_update
+            self._last_update = now
+
+            rpm = self.max_requests_per_minute
+            tpm = self.max_tokens_per_minute
+            if rpm > 0:
+                self.available_request_capacity = min(
+                    rpm, self.available_request_capacity + rpm * elapsed / 60.0
+                )
+            if tpm > 0:
+                self.available_token_capacity = min(
+                    tpm, self.available_token_capacity + tpm * elapsed / 60.0
+                )
+                # A request larger than the whole bucket would never fit; cap it.
+                tokens = min(tokens, tpm)
+
+            wait = 0.0
+            if rpm > 0 and self.available_request_capacity < 1:
+                wait = max(wait, (1 - self.available_request_capacity) * 60.0 / rpm)
+            if tpm > 0 and self.available_token_capacity < tokens:
+                wait = max(wait, (tokens - self.available_token_capacity) * 60.0 / tpm)
+            if wait > 0:
+                return wait
+
+            if rpm > 0:
+                self.available_request_capacity -= 1
+            if tpm > 0:
+                self.available_token_capacity -= tokens
+            return 0.0
+
+    def acquire(self, tokens: int = 0) -> None:
+        """Block the calling thread until one request and `tokens` are available"""
+        if not self.enabled:
+            return
+        while True:
+            wait = self._try_consume(tokens)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens: int = 0) -> None:
+        """Wait (without blocking the event loop) until capacity is available"""
+        if not self.enabled:
+            return
+        while True:
+            wait = self._try_consume(tokens)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
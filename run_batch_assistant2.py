@@ -12,8 +12,7 @@ SCRIPT_DIR = Path(__file__).resolve().parent
 if str(SCRIPT_DIR) not in sys.path:
     sys.path.insert(0, str(SCRIPT_DIR))
 
-from batch_processor import process_files
-from chat_notifier import send_chat_message, format_batch_summary
+from batch_runner import run
 
 # ============================================================================
 # CONFIGURE YOUR PARAMETERS HERE
@@ -67,92 +66,13 @@ USE_CONVERSATION = False
 # ============================================================================
 
 if __name__ == "__main__":
-    # Avoid UnicodeEncodeError on Windows cp1252 console.
-    try:
-        import sys
-        if hasattr(sys.stdout, "reconfigure"):
-            sys.stdout.reconfigure(encoding="utf-8")
-    except Exception:
-        pass
-
-    print("=" * 80)
-    print("STARTING BATCH PROCESSING - ASSISTANT 2")
-    print("=" * 80)
-    print(f"Assistant: {ASSISTANT_FILE}")
-    print(f"Input Folder: {INPUT_FOLDER}")
-    print("=" * 80)
-
-    try:
-        # Process all files
-        extra_attachments = [MAPPING_FILE] if INCLUDE_MAPPING_FILE else None
-        results = process_files(
-            user_message=USER_MESSAGE,
-            assistant_json_file=ASSISTANT_FILE,
-            input_folder=INPUT_FOLDER,
-            output_summary_file=OUTPUT_SUMMARY,
-            extra_attachments=extra_attachments,
-            output_dir=OUTPUT_FOLDER,
-            use_conversation=USE_CONVERSATION,
-        )
-
-        # Show summary
-        print("\n" + "=" * 80)
-        print("BATCH PROCESSING COMPLETED - ASSISTANT 2")
-        print("=" * 80)
-
-        successful = [r for r in results if r["status"] == "success"]
-        failed = [r for r in results if r["status"] == "error"]
-
-        print(f"Total files processed: {len(results)}")
-        print(f"Successful: {len(successful)}")
-        print(f"Failed: {len(failed)}")
-
-        if failed:
-            print("\nFailed files:")
-            for result in failed:
-                print(f"  FAIL {result['input_file']}: {result.get('error', 'Unknown error')}")
-
-        print(f"\nResults saved to: {OUTPUT_SUMMARY}")
-        print(f"Output Excel files saved in: {OUTPUT_FOLDER or 'current directory'}")
-        print("=" * 80)
-
-        message_lines = [
-            "Batch processing acknowledgement - Assistant 2",
-            f"Total files: {len(results)}",
-            f"Successful: {len(successful)}",
-            f"Failed: {len(failed)}",
-            f"Summary JSON: {OUTPUT_SUMMARY}",
-        ]
-        if successful:
-            message_lines.append("Successful files:")
-            for r in successful[:50]:
-                message_lines.append(f"  OK  {r['input_file']}")
-            if len(successful) > 50:
-                message_lines.append(f"  ...and {len(successful) - 50} more")
-        if failed:
-            message_lines.append("Failed files:")
-            for r in failed[:50]:
-                message_lines.append(f"  FAIL {r['input_file']}: {r.get('error', 'Unknown error')}")
-            if len(failed) > 50:
-                message_lines.append(f"  ...and {len(failed) - 50} more")
-
-        message = "\n".join(message_lines)
-        try:
-            send_chat_message(message)
-        except Exception as notify_error:
-            print(f"Failed to send Google Chat message: {notify_error}")
-    except Exception as run_error:
-        error_message = f"Batch run failed: {run_error}"
-        try:
-            send_chat_message(
-                format_batch_summary(
-                    total=0,
-                    successful=0,
-                    failed=0,
-                    summary_path=OUTPUT_SUMMARY,
-                    error_message=error_message,
-                )
-            )
-        except Exception as notify_error:
-            print(f"Failed to send Google Chat message: {notify_error}")
-        raise
+    run(
+        "Assistant 2",
+        assistant_file=ASSISTANT_FILE,
+        input_folder=INPUT_FOLDER,
+        output_summary=OUTPUT_SUMMARY,
+        output_folder=OUTPUT_FOLDER,
+        user_message=USER_MESSAGE,
+        extra_attachments=[MAPPING_FILE] if INCLUDE_MAPPING_FILE else None,
+        use_conversation=USE_CONVERSATION,
+    )
@@ -5,15 +5,23 @@ Usage:
   python split_input_excel.py --input "C:\path\keywords_last_monday.xlsx"
   python split_input_excel.py --input "C:\path\keywords_last_monday.xlsx" --chunk-size 200
   python split_input_excel.py --input "C:\path\keywords_last_monday.xlsx" --output-dir "C:\path\split\2026-01-20"
+  python split_input_excel.py --input "C:\path\keywords_last_monday.xlsx" --format parquet
 """
 from __future__ import annotations
 
 import argparse
+import io
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
 from datetime import date
+from importlib.util import find_spec
+from itertools import repeat
 from pathlib import Path
+from typing import Optional
 
 import pandas as pd
+from openpyxl import Workbook
 
 SCRIPT_DIR = Path(__file__).resolve().parent
 if str(SCRIPT_DIR) not in sys.path:
@@ -21,10 +29,70 @@ if str(SCRIPT_DIR) not in sys.path:
 
 from chat_notifier import send_chat_message
 
-def split_excel_into_chunks(input_file: str, output_dir: str, chunk_size: int = 100) -> Path:
+SHEET_NAME = "Keywords"
+
+# Below this many chunks, worker process start-up costs more than it saves
+_PARALLEL_MIN_CHUNKS = 4
+
+# Rust-based calamine parser when installed (python-calamine), else openpyxl
+_EXCEL_ENGINE: Optional[str] = "calamine" if find_spec("python_calamine") else None
+
+# Chunk file formats. The assistant steps only pick up Excel files, so the
+# columnar formats are for consumers outside the OpenAI pipeline.
+CHUNK_FORMATS = ("xlsx", "parquet", "feather")
+
+
+def _write_chunk(filepath: Path, columns: list, rows: list) -> None:
+    """
+    Write one chunk with a write-only workbook: rows are streamed to the sheet
+    XML instead of building a cell object graph per file (as to_excel does).
+
+    Args:
+        filepath: Output .xlsx path
+        columns: Header row
+        rows: Data rows (lists of plain Python values, None for empty cells)
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(SHEET_NAME)
+    ws.append(columns)
+    for row in rows:
+        ws.append(row)
+    wb.save(filepath)
+
+
+def _read_input(data: bytes, name: str) -> pd.DataFrame:
+    # Parsed from memory, so the openpyxl retry does not touch the file again
+    if _EXCEL_ENGINE:
+        try:
+            return pd.read_excel(io.BytesIO(data), engine=_EXCEL_ENGINE)
+        except Exception as e:
+            print(f"[WARN] {_EXCEL_ENGINE} could not read {name} ({e}); retrying with openpyxl")
+    return pd.read_excel(io.BytesIO(data))
+
+
+def _write_columnar_chunk(chunk_df: pd.DataFrame, filepath: Path, fmt: str) -> None:
+    """Write one chunk as Parquet (snappy) or Feather; both skip the XML/zip encode"""
+    chunk_df = chunk_df.reset_index(drop=True)
+    if fmt == "parquet":
+        chunk_df.to_parquet(filepath, compression="snappy", index=False)
+    else:
+        chunk_df.to_feather(filepath)
+
+
+def split_excel_into_chunks(
+    input_file: str, output_dir: str, chunk_size: int = 100, fmt: str = "xlsx"
+) -> Path:
+    if fmt not in CHUNK_FORMATS:
+        raise SystemExit(f"[ERROR] Unsupported chunk format: {fmt} (expected one of {', '.join(CHUNK_FORMATS)})")
+    if fmt != "xlsx" and find_spec("pyarrow") is None:
+        raise SystemExit(f"[ERROR] {fmt} output requires pyarrow (pip install pyarrow)")
+
     input_path = Path(input_file).expanduser().resolve()
-    if not input_path.exists():
-        raise SystemExit(f"[ERROR] Input Excel file not found: {input_path}")
+    # One open + sequential read (no separate exists() stat on a network share)
+    try:
+        input_data = input_path.read_bytes()
+    except FileNotFoundError:
+        raise SystemExit(f"[ERROR] Input Excel file not found: {input_path}") from None
 
     output_path = Path(output_dir).expanduser().resolve()
     output_path.mkdir(parents=True, exist_ok=True)
@@ -34,7 +102,8 @@ def split_excel_into_chunks(input_file: str, output_dir: str, chunk_size: int =
     print("=" * 60)
     print(f"\nReading file: {input_path}")
 
-    df = pd.read_excel(input_path)
+    df = _read_input(input_data, input_path.name)
+    del input_data
     total_rows = len(df)
     if total_rows == 0:
         raise SystemExit("[ERROR] Input Excel sheet is empty.")
@@ -42,6 +111,7 @@ def split_excel_into_chunks(input_file: str, output_dir: str, chunk_size: int =
     print(f"Total rows: {total_rows}")
     print(f"Columns: {', '.join(df.columns.tolist())}")
     print(f"Chunk size: {chunk_size} rows")
+    print(f"Chunk format: {fmt}")
 
     num_chunks = (total_rows + chunk_size - 1) // chunk_size
     print(f"Number of files to create: {num_chunks}")
@@ -50,15 +120,34 @@ def split_excel_into_chunks(input_file: str, output_dir: str, chunk_size: int =
     print("\nSplitting file...")
     print("-" * 60)
 
-    for i in range(num_chunks):
-        start_idx = i * chunk_size
-        end_idx = min((i + 1) * chunk_size, total_rows)
-
-        chunk_df = df.iloc[start_idx:end_idx]
-        filename = f"keywords_chunk_{i+1:03d}_rows_{start_idx+1}-{end_idx}.xlsx"
-        filepath = output_path / filename
-        chunk_df.to_excel(filepath, index=False, sheet_name="Keywords")
-        print(f"[{i+1:3d}/{num_chunks}] Created: {filename} ({len(chunk_df)} rows)")
+    bounds = [(start, min(start + chunk_size, total_rows)) for start in range(0, total_rows, chunk_size)]
+    filenames = [f"keywords_chunk_{i+1:03d}_rows_{start+1}-{end}.{fmt}" for i, (start, end) in enumerate(bounds)]
+    filepaths = [output_path / filename for filename in filenames]
+
+    if fmt == "xlsx":
+        # Convert the parsed frame to plain row lists once (NaN/NaT -> empty cell)
+        columns = [str(c) for c in df.columns]
+        rows = df.astype(object).where(df.notna(), None).to_numpy().tolist()
+        row_slices = [rows[start:end] for start, end in bounds]
+
+    with ExitStack() as stack:
+        if fmt != "xlsx":
+            # Columnar writes are fast enough that worker processes would not pay off
+            written = (
+                _write_columnar_chunk(df.iloc[start:end], filepath, fmt)
+                for filepath, (start, end) in zip(filepaths, bounds)
+            )
+        elif num_chunks < _PARALLEL_MIN_CHUNKS:
+            written = map(_write_chunk, filepaths, repeat(columns), row_slices)
+        else:
+            # Serializing and zip-compressing each workbook is CPU-bound: spread chunks over processes
+            ex = stack.enter_context(ProcessPoolExecutor())
+            written = ex.map(_write_chunk, filepaths, repeat(columns), row_slices, chunksize=4)
+
+        # Results arrive in chunk order, so progress lines stay ordered
+        for i, _ in enumerate(written):
+            start_idx, end_idx = bounds[i]
+            print(f"[{i+1:3d}/{num_chunks}] Created: {filenames[i]} ({end_idx - start_idx} rows)")
 
     print("-" * 60)
     print("\n[SUCCESS] Split complete!")
@@ -89,6 +178,13 @@ def main() -> None:
         default=None,
         help="Directory to write split files (default: data\\split\\YYYY-MM-DD)",
     )
+    parser.add_argument(
+        "--format",
+        choices=CHUNK_FORMATS,
+        default="xlsx",
+        help="Chunk file format (default: xlsx; the assistant steps read xlsx only, "
+        "parquet/feather require pyarrow)",
+    )
     args = parser.parse_args()
 
     if args.output_dir:
@@ -102,6 +198,7 @@ def main() -> None:
             input_file=args.input,
             output_dir=output_dir,
             chunk_size=args.chunk_size,
+            fmt=args.format,
         )
         send_chat_message(
             "\n".join(
@@ -110,6 +207,7 @@ def main() -> None:
                     f"Input file: {Path(args.input).expanduser().resolve()}",
                     f"Output folder: {output_path}",
                     f"Chunk size: {args.chunk_size}",
+                    f"Chunk format: {args.format}",
                 ]
             )
         )
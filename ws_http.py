@@ -0,0 +1,71 @@
+"""
+Shared HTTP session for the WS API scripts (pull and push).
+Connections to the WS server are pooled and kept alive, so retries and
+follow-up calls reuse the TLS handshake instead of reconnecting.
+"""
+from __future__ import annotations
+
+from typing import Iterable, Optional, Tuple
+
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Disable SSL warnings (self-signed cert on the WS server)
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+RETRY_STATUSES: Tuple[int, ...] = (429, 500, 502, 503, 504)
+
+_session: Optional[requests.Session] = None
+
+
+def build_session(
+    total_retries: int = 3,
+    backoff_factor: float = 0.5,
+    allowed_methods: Iterable[str] = ("GET",),
+    status_forcelist: Tuple[int, ...] = RETRY_STATUSES,
+    pool_maxsize: int = 16,
+) -> requests.Session:
+    """
+    Create a pooled session for the WS server with retry/backoff.
+
+    Args:
+        total_retries: Retries for connect, read and status failures
+        backoff_factor: urllib3 exponential backoff factor
+        allowed_methods: HTTP methods retried on read/status failures
+        status_forcelist: HTTP statuses that trigger a retry
+        pool_maxsize: Connections kept per host (at least the number of threads)
+
+    Returns:
+        Session with certificate verification disabled (self-signed cert).
+        REQUESTS_CA_BUNDLE/CURL_CA_BUNDLE take precedence over session.verify,
+        so callers still pass verify=False on each request.
+    """
+    session = requests.Session()
+    session.verify = False
+
+    retry = Retry(
+        total=total_retries,
+        connect=total_retries,
+        read=total_retries,
+        status=total_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=status_forcelist,
+        allowed_methods=frozenset(allowed_methods),
+        raise_on_status=False,
+        respect_retry_after_header=True,
+    )
+
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    """Process-wide default session (GET retries), created on first use"""
+    global _session
+    if _session is None:
+        _session = build_session()
+    return _session